@@ -24,20 +24,59 @@ random numbers, and building relationships between them.
 Computing for the following files: ['calls.csv', 'calls.csv'].
 file                 max     acquaintances             seconds
 ===============         ===     ===============         =======
-calls.csv               2    [6099241931, 2014638884]    0.001938
-calls.csv               2    [6099241931, 2014638884]    0.000886
+calls.csv               1    [2125551212, 6096191165]    0.0004039
+calls.csv               1    [2125551212, 6096191165]    0.0001202
 
 
 '''
+from __future__ import print_function
+
 import os.path
+import array
+import bisect
 import itertools
 import collections
+import heapq
+import json
+import mmap
+import multiprocessing
+import multiprocessing.sharedctypes
+import random
+import shutil
+import sqlite3
+import struct
+import sys
 import argparse
-import time
-import csv
+import operator
+import tempfile
+import timeit
 import unittest
 
 DEFAULT_FILE_NAME = 'calls.csv'
+# bytes read at a time when loading
+BLOCK_SIZE = 1 << 20
+MAX_NUMBER = 10 ** 15
+DIGITS = b'0123456789'
+DIGITS_AND_BLANKS = DIGITS + b' \t\r'
+try:
+    INT64 = array.array('q').typecode
+except ValueError:
+    # python 2 has no long long arrays, long is 64 bits on LP64 platforms
+    INT64 = 'l'
+INT32 = 'i'
+# friends with at least this many friends keep their friends as a set
+HUB_DEGREE = 32
+CHUNKS_PER_WORKER = 4
+# binary call file: header, calling and called int64 columns, then
+# optionally the CallGraph numbers, offsets and neighbors arrays
+CALLS_MAGIC = b'CALL'
+CALLS_VERSION = 1
+# magic, version, calls, graph vertices, graph neighbors
+CALLS_HEADER = struct.Struct('<4sIQQQ')
+CALLS_SUFFIX = '.calls'
+# reject reasons
+INVALID = 'invalid'
+EQUAL = 'equal'
 
 
 class TestAcquaintances(unittest.TestCase):
@@ -45,64 +84,845 @@ class TestAcquaintances(unittest.TestCase):
     def test_csv(self):
         processor = CallProcessor('calls.csv')
         processor.load()
-        self.assertEqual(len(processor.calls), 2)
+        self.assertEqual(len(processor.graph), 4)
+        self.assertEqual(processor.graph.edge_count(), 5)
         self.assertEqual(processor.max_acquaintances(),
-                          (2, [6099241931, 2014638884]))
+                          (1, [2125551212, 6096191165]))
+
+    def test_acquaintance_counts(self):
+        generator = random.Random(1)
+        calling = [generator.randrange(40) for _ in range(200)]
+        called = [generator.randrange(40) for _ in range(200)]
+        # a hub, and a pair who only know each other
+        calling += [100] * 50 + [200]
+        called += list(range(50)) + [201]
+        pairs = [(a, b) for a, b in zip(calling, called) if a != b]
+        graph = CallGraph.from_calls(*zip(*pairs))
+        friends = collections.defaultdict(set)
+        for a, b in pairs:
+            friends[a].add(b)
+            friends[b].add(a)
+        expected = []
+        for number in graph.numbers:
+            two_hop = set()
+            for friend in friends[number]:
+                two_hop |= friends[friend]
+            expected.append(len(two_hop - friends[number] - set([number])))
+        self.assertEqual(expected, list(acquaintance_counts(graph, 4)))
+        self.assertEqual(0, acquaintance_counts(graph)[graph.vertex(201)])
+        self.assertEqual(expected[10:20],
+                         list(acquaintance_counts(graph, 4, 10, 20)))
+
+    def assert_index_counts(self, index, calls):
+        processor = CallProcessor(None)
+        processor.build_calls(*zip(*calls))
+        self.assertEqual(processor.max_acquaintances(),
+                         index.max_acquaintances())
+        self.assertEqual(list(processor.counts),
+                         [index.count(number)
+                          for number in processor.graph.numbers])
+        self.assertEqual(processor.graph.edge_count(),
+                         index.friendship_count())
+
+    def test_acquaintance_index_hub(self):
+        calls = [(0, leaf) for leaf in range(1, 2001)]
+        with AcquaintanceIndex() as index:
+            index.add_calls(*zip(*calls))
+            # leaf to new, hub to new, leaf to leaf, new to new, then
+            # friends with a friend in common
+            for call in ((7, 5000), (0, 6000), (1, 2), (5000, 6000),
+                         (0, 5000), (6000, 7)):
+                calls.append(call)
+                self.assertEqual(1, index.add_calls([call[0]], [call[1]]))
+                self.assert_index_counts(index, calls)
+
+    def test_acquaintance_index(self):
+        generator = random.Random(2)
+        calls = [(generator.randrange(60), generator.randrange(60))
+                 for _ in range(300)]
+        calls = [(a, b) for a, b in calls if a != b]
+        index_dir = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(index_dir, 'calls.index')
+            start = 0
+            for end in (150, 200, 201, len(calls)):
+                # a new connection each time, as for hourly call files
+                with AcquaintanceIndex(file_name) as index:
+                    index.add_calls(*zip(*calls[start:end]))
+                    self.assert_index_counts(index, calls[:end])
+                start = end
+            with AcquaintanceIndex(file_name) as index:
+                self.assertEqual(0, index.add_calls(*zip(*calls)))
+                self.assertRaises(KeyError, index.count, 1000)
+                self.assertEqual(index.max_acquaintances()[1][:1],
+                                 [index.top_acquaintances(1)[0][0]])
+        finally:
+            shutil.rmtree(index_dir)
+
+    def test_call_table(self):
+        table_dir = tempfile.mkdtemp()
+        try:
+            processor = CallProcessor('calls.csv')
+            calling, called = processor.parse()
+            for graph in (True, False):
+                file_name = os.path.join(table_dir, 'calls' + CALLS_SUFFIX)
+                convert_calls('calls.csv', file_name, graph)
+                self.assertTrue(is_call_table(file_name))
+                with CallTable(file_name) as table:
+                    self.assertEqual(list(calling), list(table.calling))
+                    self.assertEqual(list(called), list(table.called))
+                    self.assertEqual(graph, table.graph is not None)
+                binary = CallProcessor(file_name)
+                self.assertEqual(processor.run(), binary.run())
+                self.assertEqual(processor.run(), binary.run(workers=2))
+                self.assertEqual(list(processor.graph.neighbors),
+                                 list(binary.graph.neighbors))
+                binary.close()
+            self.assertFalse(is_call_table('calls.csv'))
+
+            self.assertRaises(ValueError, convert_calls, file_name,
+                              file_name + '.calls')
+            csv_file_name = os.path.join(table_dir, 'calls.csv')
+            shutil.copy('calls.csv', csv_file_name)
+            self.assertRaises(ValueError, convert_calls, csv_file_name,
+                              csv_file_name)
+            with open(file_name, 'rb') as call_file:
+                data = call_file.read()
+            for size in (len(data) - 4, CALLS_HEADER.size - 1):
+                with open(file_name, 'wb') as call_file:
+                    call_file.write(data[:size])
+                self.assertRaises(ValueError, CallTable, file_name)
+            self.assertEqual([file_name, csv_file_name], sorted(
+                os.path.join(table_dir, name)
+                for name in os.listdir(table_dir)))
+        finally:
+            shutil.rmtree(table_dir)
+
+    def test_max_acquaintances_workers(self):
+        processor = CallProcessor('calls.csv')
+        processor.load()
+        workers = CallProcessor('calls.csv')
+        workers.load()
+        self.assertEqual(processor.max_acquaintances(),
+                         workers.max_acquaintances(workers=2))
+        # the counts of the pool are kept for the next queries
+        counts = workers.counts
+        self.assertEqual(list(processor.counts), list(counts))
+        workers.top_acquaintances(2, workers=2)
+        self.assertTrue(counts is workers.counts)
+
+    def test_top_acquaintances(self):
+        processor = CallProcessor('calls.csv')
+        processor.load()
+        top = [(2125551212, 1), (6096191165, 1), (2014638884, 0)]
+        self.assertEqual(top, processor.top_acquaintances(3))
+        self.assertEqual(4, len(processor.top_acquaintances(10)))
+
+        generator = random.Random(3)
+        calls = [(generator.randrange(100), generator.randrange(100))
+                 for _ in range(300)]
+        processor.build_calls(*zip(*[(a, b) for a, b in calls if a != b]))
+        counts = acquaintance_counts(processor.graph)
+        expected = sorted(zip(processor.graph.numbers, counts),
+                          key=lambda top: (-top[1], top[0]))[:20]
+        self.assertEqual(expected, processor.top_acquaintances(20))
+        processor.counts = None
+        self.assertEqual(expected, processor.top_acquaintances(20, 3))
+
+    def test_call_graph(self):
+        graph = CallGraph.from_calls([30, 10, 20, 10], [10, 30, 10, 40])
+        self.assertEqual([10, 20, 30, 40], list(graph.numbers))
+        self.assertEqual(3, graph.edge_count())
+        self.assertEqual([1, 2, 3], list(graph.neighbors_of(0)))
+        self.assertEqual(0, graph.vertex(10))
+        self.assertEqual(3, graph.degree(0))
+        self.assertEqual([10], graph.friends(40))
+        self.assertRaises(KeyError, graph.vertex, 25)
+        self.assertEqual(0, len(CallGraph.from_calls([], [])))
+
+    def test_parse_calls_first_line(self):
+        for first, rejected in ((b'calling #, called #', 0),
+                                (b'calling, called', 0), (b'', 0),
+                                (b'12, x', 1), (b'1, 2, 3', 1)):
+            with tempfile.TemporaryFile() as call_file:
+                call_file.write(first + b'\n4, 5\n')
+                call_file.seek(0)
+                calling, called, rejects = parse_calls(call_file)
+            self.assertEqual([4], list(calling))
+            self.assertEqual(rejected, rejects[INVALID])
+
+    def test_parse_calls(self):
+        lines = [b'calling #, called #', b'1, 2', b'3,4', b'', b'5, 5',
+                 b'6, x', b'7, 8, 9', b' 10 ,11\r', b'1234567890123456, 1',
+                 b'1 4, 5', b', 1', b'-1, 2', b'12, 13']
+        with tempfile.TemporaryFile() as call_file:
+            call_file.write(b'\n'.join(lines))
+            for block_size in (7, BLOCK_SIZE):
+                call_file.seek(0)
+                calling, called, rejects = parse_calls(call_file,
+                                                       block_size)
+                self.assertEqual([1, 3, 10, 12], list(calling))
+                self.assertEqual([2, 4, 11, 13], list(called))
+                self.assertEqual({INVALID: 6, EQUAL: 1}, dict(rejects))
+
+
+def parse_call(line):
+    """
+    Calling and called numbers of a call line, ValueError if invalid
+    """
+    fields = line.split(b',')
+    if len(fields) != 2:
+        raise ValueError('expected 2 fields: %r' % line)
+    calling, called = map(int, fields)
+    if not (0 <= calling < MAX_NUMBER and 0 <= called < MAX_NUMBER):
+        raise ValueError('invalid phone numbers: %r' % line)
+    return calling, called
+
+
+def _parse_lines(lines, calling, called, rejects):
+    """
+    Parse the call lines one at a time, counting the rejects
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            calling_number, called_number = parse_call(line)
+        except ValueError:
+            rejects[INVALID] += 1
+            continue
+        if calling_number == called_number:
+            rejects[EQUAL] += 1
+            continue
+        calling.append(calling_number)
+        called.append(called_number)
+
+
+def _parse_block(block, calling, called, rejects):
+    """
+    Parse a block of whole lines.  When every line has exactly one comma
+    between numbers, the block is converted in bulk as a JSON list of
+    integers; otherwise, or if any value is rejected, line by line.
+    """
+    lines = block.count(b'\n')
+    if lines and block.translate(None, DIGITS_AND_BLANKS) == b',\n' * lines:
+        try:
+            numbers = array.array(INT64, json.loads(
+                b'[' + block.replace(b'\n', b',')[:-1] + b']'))
+        except (ValueError, OverflowError):
+            numbers = None
+        if numbers is not None and max(numbers) < MAX_NUMBER:
+            block_calling, block_called = numbers[0::2], numbers[1::2]
+            if not any(map(operator.eq, block_calling, block_called)):
+                calling.extend(block_calling)
+                called.extend(block_called)
+                return
+    _parse_lines(block.split(b'\n'), calling, called, rejects)
+
+
+def parse_calls(call_file, block_size=BLOCK_SIZE):
+    """
+    Parse a binary file of "calling #, called #" lines, with an optional
+    header line, block_size bytes at a time.
+    Return the calling and called numbers as int64 arrays, and a counter
+    of the rejected lines by reason.
+    """
+    calling = array.array(INT64)
+    called = array.array(INT64)
+    rejects = collections.Counter()
+    header = True
+    remainder = b''
+    while True:
+        data = call_file.read(block_size)
+        block = remainder + data
+        if data:
+            end = block.rfind(b'\n') + 1
+            block, remainder = block[:end], block[end:]
+        elif not block:
+            break
+        elif not block.endswith(b'\n'):
+            block += b'\n'
+        if header and block:
+            header = False
+            first, _, rest = block.partition(b'\n')
+            try:
+                parse_call(first)
+            except ValueError:
+                # a header has no digits, a bad first call has some
+                if first.translate(None, DIGITS) != first:
+                    rejects[INVALID] += 1
+                block = rest
+        _parse_block(block, calling, called, rejects)
+        if not data:
+            break
+    return calling, called, rejects
+
+
+class CallGraph(object):
+    """
+    Undirected call graph without duplicate edges, in compressed sparse
+    row form: the sorted distinct phone numbers, an int64 array whose
+    indexes are the vertex ids, and the sorted neighbor ids of each
+    vertex, neighbors[offsets[vertex]:offsets[vertex + 1]], int32 arrays.
+    """
+    def __init__(self, numbers, offsets, neighbors):
+        self.numbers = numbers
+        self.offsets = offsets
+        self.neighbors = neighbors
+
+    @classmethod
+    def from_calls(cls, calling_numbers, called_numbers):
+        """
+        Graph of the calls, from the calling and called number columns.
+        Each friendship is packed both ways as source * size + target
+        ids: sorting the packed ints groups the targets by source, and
+        equal neighbors in the sorted order are the duplicate calls.
+        """
+        numbers = array.array(INT64, sorted(
+            set(calling_numbers).union(called_numbers)))
+        size = len(numbers)
+        # the ids of the numbers in bulk, bisect is slower per lookup
+        index = dict(zip(numbers, itertools.count()))
+        calling = array.array(INT32, map(index.__getitem__, calling_numbers))
+        called = array.array(INT32, map(index.__getitem__, called_numbers))
+        del index
+
+        sizes = itertools.repeat(size, len(calling))
+        edges = array.array(INT64, map(operator.add,
+                                       map(operator.mul, calling, sizes),
+                                       called))
+        sizes = itertools.repeat(size, len(calling))
+        edges.extend(map(operator.add, map(operator.mul, called, sizes),
+                         calling))
+        del calling, called
+        edges = sorted(edges)
+        unique = array.array(INT64, edges[:1])
+        unique.extend(itertools.compress(
+            itertools.islice(edges, 1, None),
+            map(operator.ne, itertools.islice(edges, 1, None), edges)))
+        del edges
+
+        offsets = array.array(INT32, map(
+            bisect.bisect_left, itertools.repeat(unique, size + 1),
+            map(operator.mul, range(size + 1),
+                itertools.repeat(size, size + 1))))
+        neighbors = array.array(INT32, map(
+            operator.mod, unique, itertools.repeat(size, len(unique))))
+        return cls(numbers, offsets, neighbors)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def edge_count(self):
+        return len(self.neighbors) // 2
+
+    def vertex(self, number):
+        """
+        Vertex id of a phone number, KeyError if it made no calls
+        """
+        vertex = bisect.bisect_left(self.numbers, number)
+        if vertex == len(self.numbers) or self.numbers[vertex] != number:
+            raise KeyError(number)
+        return vertex
+
+    def degree(self, vertex):
+        return self.offsets[vertex + 1] - self.offsets[vertex]
+
+    def neighbors_of(self, vertex):
+        return self.neighbors[self.offsets[vertex]:self.offsets[vertex + 1]]
+
+    def friends(self, number):
+        """
+        Phone numbers that talked with number
+        """
+        return [self.numbers[friend]
+                for friend in self.neighbors_of(self.vertex(number))]
+
+
+def acquaintance_counts(graph, hub_degree=HUB_DEGREE, low=0, high=None):
+    """
+    Number of acquaintances of the vertices low to high (excluded, all
+    by default) of graph, the friends of their friends who are neither
+    themselves nor their friends.
+    The friends of the friend with the most friends are not merged into
+    the friends of friends, they are counted against it as a set, kept
+    for those with at least hub_degree friends: hubs are then scanned
+    once instead of once per friend.
+    """
+    offsets = graph.offsets
+    neighbors = graph.neighbors
+    degrees = list(map(operator.sub, offsets[1:], offsets[:-1]))
+    if high is None:
+        high = len(graph)
+    counts = array.array(INT32, [0]) * (high - low)
+    hubs = {}
+    for vertex in range(low, high):
+        friends = neighbors[offsets[vertex]:offsets[vertex + 1]]
+        if not friends:
+            continue
+        hub = max(friends, key=degrees.__getitem__)
+        hub_friends = hubs.get(hub)
+        if hub_friends is None:
+            hub_friends = set(neighbors[offsets[hub]:offsets[hub + 1]])
+            if degrees[hub] >= hub_degree:
+                hubs[hub] = hub_friends
+        known = set(friends)
+        known.add(vertex)
+        others = set()
+        for friend in friends:
+            if friend != hub:
+                others.update(neighbors[offsets[friend]:offsets[friend + 1]])
+        others.difference_update(hub_friends)
+        others.difference_update(known)
+        counts[vertex - low] = (len(hub_friends) - len(known.intersection(
+            hub_friends)) + len(others))
+    return counts
+
+
+def max_counts(counts):
+    """
+    Max of counts, and the sorted positions holding it
+    """
+    if not counts:
+        return 0, []
+    max_count = max(counts)
+    return max_count, [position for position, count in enumerate(counts)
+                       if count == max_count]
+
+
+def top_counts(counts, k):
+    """
+    The k (position, count) with the largest counts, by decreasing count
+    then increasing position
+    """
+    top = heapq.nlargest(k, zip(counts, range(0, -len(counts), -1)))
+    return [(-position, count) for count, position in top]
+
+
+def _shared_array(typecode, values):
+    """
+    Copy of values in shared memory
+    """
+    shared = multiprocessing.sharedctypes.RawArray(typecode, len(values))
+    shared[:] = values
+    return shared
+
+
+_worker_graph = None
+_worker_counts = None
+
+
+def _init_worker(offsets, neighbors, counts):
+    """
+    Process pool initializer: keep the graph arrays and the counts
+    array in shared memory
+    """
+    global _worker_graph, _worker_counts
+    _worker_graph = CallGraph(None, offsets, neighbors)
+    _worker_counts = counts
+
+
+def _acquaintance_counts_worker(bounds):
+    low, high = bounds
+    _worker_counts[low:high] = acquaintance_counts(_worker_graph, low=low,
+                                                   high=high)
+
+
+def _parallel_acquaintance_counts(graph, workers):
+    """
+    acquaintance_counts over a process pool: the vertices are split in
+    ranges of about as many neighbors, whose counts the workers write
+    in a shared counts array.  The graph arrays are placed once in
+    shared memory, only the range bounds are pickled.
+    """
+    size = len(graph)
+    chunks = min(size, workers * CHUNKS_PER_WORKER)
+    per_chunk = (len(graph.neighbors) + chunks - 1) // chunks
+    starts = sorted(set(bisect.bisect_left(graph.offsets, chunk * per_chunk,
+                                           0, size)
+                        for chunk in range(chunks)))
+    bounds = list(zip(starts, starts[1:] + [size]))
+    offsets = _shared_array(INT32, graph.offsets)
+    neighbors = _shared_array(INT32, graph.neighbors)
+    counts = multiprocessing.sharedctypes.RawArray(INT32, size)
+    pool = multiprocessing.Pool(workers, _init_worker,
+                                (offsets, neighbors, counts))
+    try:
+        pool.map(_acquaintance_counts_worker, bounds)
+    finally:
+        pool.close()
+        pool.join()
+    return array.array(INT32, counts)
+
+
+def write_calls(file_name, calling_numbers, called_numbers, graph=None):
+    """
+    Write the calls, and their CallGraph if given, in the binary call
+    format.  Layout (little endian): header, the calling then called
+    numbers as int64, then the graph numbers as int64 and its offsets
+    and neighbors as int32.
+    """
+    if graph is not None and not len(graph):
+        graph = None
+    vertices = len(graph) if graph is not None else 0
+    neighbors = len(graph.neighbors) if graph is not None else 0
+    columns = [(INT64, calling_numbers), (INT64, called_numbers)]
+    if graph is not None:
+        columns += [(INT64, graph.numbers), (INT32, graph.offsets),
+                    (INT32, graph.neighbors)]
+    # written aside then renamed, a mapped file is never truncated
+    handle, temp_name = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(file_name)))
+    try:
+        with os.fdopen(handle, 'wb') as call_file:
+            call_file.write(CALLS_HEADER.pack(CALLS_MAGIC, CALLS_VERSION,
+                                              len(calling_numbers),
+                                              vertices, neighbors))
+            for typecode, values in columns:
+                values = array.array(typecode, values)
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                values.tofile(call_file)
+        # mkstemp files are private, give the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_name, 0o666 & ~umask)
+        # os.rename does not replace an existing file on Windows
+        getattr(os, 'replace', os.rename)(temp_name, file_name)
+    except Exception:
+        os.remove(temp_name)
+        raise
+
+
+def call_file_size(calls, vertices, neighbors):
+    """
+    Size of a binary call file with these header counts
+    """
+    size = CALLS_HEADER.size + 2 * calls * array.array(INT64).itemsize
+    if vertices:
+        size += (vertices * array.array(INT64).itemsize +
+                 (vertices + 1 + neighbors) * array.array(INT32).itemsize)
+    return size
+
+
+def convert_calls(csv_file_name, file_name, graph=True):
+    """
+    Convert a csv call file to the binary call format, with its graph
+    unless graph is False.  Return the counter of the rejected lines.
+    """
+    if is_call_table(csv_file_name):
+        raise ValueError("%s is already a call table" % csv_file_name)
+    if os.path.realpath(csv_file_name) == os.path.realpath(file_name):
+        raise ValueError("%s would be converted over itself" % file_name)
+    processor = CallProcessor(csv_file_name)
+    calling, called = processor.parse()
+    write_calls(file_name, calling, called,
+                CallGraph.from_calls(calling, called) if graph else None)
+    return processor.rejects
+
+
+def is_call_table(file_name):
+    with open(file_name, 'rb') as call_file:
+        return call_file.read(len(CALLS_MAGIC)) == CALLS_MAGIC
+
+
+class CallTable(object):
+    """
+    Read only, memory mapped view of a file written by write_calls.
+    On little endian Python 3 the columns and the graph arrays are
+    views of the map: opening copies nothing, the pages are shared
+    through the OS page cache.  Elsewhere the arrays are copied.
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as call_file:
+            self.buffer = mmap.mmap(call_file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        self.views = []
+        if len(self.buffer) < CALLS_HEADER.size:
+            self.close()
+            raise ValueError("invalid call file %s" % file_name)
+        magic, version, calls, vertices, neighbors = (
+            CALLS_HEADER.unpack_from(self.buffer, 0))
+        if (magic != CALLS_MAGIC or version != CALLS_VERSION or
+                len(self.buffer) != call_file_size(calls, vertices,
+                                                   neighbors)):
+            self.close()
+            raise ValueError("invalid call file %s" % file_name)
+        self.offset = CALLS_HEADER.size
+        self.calling = self._array(INT64, calls)
+        self.called = self._array(INT64, calls)
+        self.graph = None
+        if vertices:
+            self.graph = CallGraph(self._array(INT64, vertices),
+                                   self._array(INT32, vertices + 1),
+                                   self._array(INT32, neighbors))
+
+    def _array(self, typecode, length):
+        start = self.offset
+        self.offset += length * array.array(typecode).itemsize
+        if sys.byteorder == 'little' and hasattr(memoryview, 'cast'):
+            view = memoryview(self.buffer)[start:self.offset].cast(typecode)
+            self.views.append(view)
+            return view
+        values = array.array(typecode)
+        # fromstring is frombytes on Python 3
+        getattr(values, 'frombytes', values.fromstring)(
+            self.buffer[start:self.offset])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close the map, the views and graph read from it become invalid
+        """
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.buffer.close()
+
+
+class AcquaintanceIndex(object):
+    """
+    Friendships and acquaintance counts of the calls added so far, in an
+    sqlite file.  Adding a friendship only changes the counts of its
+    two numbers and of their friends, by amounts found from the friends
+    and friends of friends of the two numbers: the cost of adding calls
+    grows with the calls and not the history.
+    The first calls of an empty index are counted in bulk.
+    """
+    def __init__(self, file_name=':memory:'):
+        self.file_name = file_name
+        self.connection = sqlite3.connect(file_name)
+        # friendships are stored both ways
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS friends ('
+            'number INTEGER, friend INTEGER, '
+            'PRIMARY KEY (number, friend)) WITHOUT ROWID')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS acquaintances ('
+            'number INTEGER PRIMARY KEY, count INTEGER)')
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS acquaintances_count '
+            'ON acquaintances (count DESC, number)')
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def friendship_count(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM friends').fetchone()[0] // 2
+
+    def friends(self, number):
+        return set(friend for friend, in self.connection.execute(
+            'SELECT friend FROM friends WHERE number = ?', (number,)))
+
+    def friends_of_friends(self, number):
+        return set(friend for friend, in self.connection.execute(
+            'SELECT DISTINCT second.friend FROM friends AS first '
+            'JOIN friends AS second ON second.number = first.friend '
+            'WHERE first.number = ?', (number,)))
+
+    def _add_friendship(self, first, second, changes):
+        """
+        Add the friendship of two numbers, adding the acquaintance count
+        changes to the changes counter; return False if they were
+        already friends.
+        The friends of each number who are neither friends nor friends
+        of friends of the other gain it as acquaintance, and it gains
+        them.  The two numbers lose each other as acquaintances if they
+        had a friend in common.
+        """
+        friends = {first: self.friends(first), second: self.friends(second)}
+        if second in friends[first]:
+            return False
+        reach = {first: self.friends_of_friends(first),
+                 second: self.friends_of_friends(second)}
+        if second in reach[first]:
+            changes[first] -= 1
+            changes[second] -= 1
+        for number, other in ((first, second), (second, first)):
+            gained = [friend for friend in friends[number]
+                      if friend not in friends[other] and
+                      friend not in reach[other]]
+            for friend in gained:
+                changes[friend] += 1
+            changes[other] += len(gained)
+        self.connection.executemany('INSERT INTO friends VALUES (?, ?)',
+                                    ((first, second), (second, first)))
+        return True
+
+    def _add_graph(self, graph):
+        numbers = graph.numbers
+        self.connection.executemany(
+            'INSERT INTO friends VALUES (?, ?)',
+            ((numbers[vertex], numbers[friend])
+             for vertex in range(len(graph))
+             for friend in graph.neighbors_of(vertex)))
+        self.connection.executemany(
+            'INSERT INTO acquaintances VALUES (?, ?)',
+            zip(numbers, acquaintance_counts(graph)))
+        return graph.edge_count()
+
+    def add_calls(self, calling_numbers, called_numbers):
+        """
+        Add the calls and update the acquaintance counts they change.
+        Return the number of new friendships.
+        """
+        pairs = set((min(calling, called), max(calling, called))
+                    for calling, called in zip(calling_numbers,
+                                               called_numbers)
+                    if calling != called)
+        if not pairs:
+            return 0
+        if self.connection.execute(
+                'SELECT 1 FROM friends LIMIT 1').fetchone() is None:
+            added = self._add_graph(CallGraph.from_calls(*zip(*pairs)))
+            self.connection.commit()
+            return added
+
+        changes = collections.Counter()
+        added = 0
+        for first, second in sorted(pairs):
+            added += self._add_friendship(first, second, changes)
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO acquaintances VALUES (?, 0)',
+            ((number,) for number in changes))
+        self.connection.executemany(
+            'UPDATE acquaintances SET count = count + ? WHERE number = ?',
+            ((change, number) for number, change in changes.items()
+             if change))
+        self.connection.commit()
+        return added
+
+    def count(self, number):
+        """
+        Acquaintances count of a phone number, KeyError if it made no calls
+        """
+        row = self.connection.execute(
+            'SELECT count FROM acquaintances WHERE number = ?',
+            (number,)).fetchone()
+        if row is None:
+            raise KeyError(number)
+        return row[0]
+
+    def max_acquaintances(self):
+        """
+        Return the max acquaintances count and the sorted phone numbers
+        with that many acquaintances
+        """
+        max_count, = self.connection.execute(
+            'SELECT MAX(count) FROM acquaintances').fetchone()
+        if max_count is None:
+            return 0, []
+        return max_count, [number for number, in self.connection.execute(
+            'SELECT number FROM acquaintances WHERE count = ? '
+            'ORDER BY number', (max_count,))]
+
+    def top_acquaintances(self, k):
+        """
+        The k (phone number, acquaintances count) with the most
+        acquaintances, by decreasing count then increasing number
+        """
+        return self.connection.execute(
+            'SELECT number, count FROM acquaintances '
+            'ORDER BY count DESC, number LIMIT ?', (k,)).fetchall()
 
 
 class CallProcessor(object):
     def __init__(self, file_name):
         self.file_name = file_name
-        self.calls = collections.defaultdict(list)
-        self.aquaintances = collections.defaultdict(set)
+        self.table = None
+        self.graph = None
+        self.counts = None
+        self.rejects = collections.Counter()
 
-    def load(self):
+    def close(self):
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    def parse(self):
+        """
+        Return the calling and called numbers of the file, a csv file
+        or a call table opened in place
+        """
+        if is_call_table(self.file_name):
+            self.close()
+            self.table = CallTable(self.file_name)
+            return self.table.calling, self.table.called
         with open(self.file_name, 'rb') as phone_file:
-            has_header = csv.Sniffer().has_header(phone_file.read(1024))
-            phone_file.seek(0)
-            incsv = csv.reader(phone_file, delimiter=',')
-            if has_header:
-                next(incsv)  # skip header row
-            self.build_calls(incsv)
-
-    def run(self):
-        self.load()
-        return self.max_acquaintances()
+            calling, called, self.rejects = parse_calls(phone_file)
+        return calling, called
 
-    def build_calls(self, csv_handle):
-        for row in csv_handle:
-            try:
-                calling, called = map(int, row)
-                if calling == called:
-                    raise ValueError(
-                        'equal calling and called (%s,%s).' % (calling,
-                                                               called))
-                self.calls[calling].append(called)
-                self.aquaintances[called].add(calling)
-            except ValueError as ex:
-                print 'invalid values; skipping row %s; %s.' % (row, ex)
+    def load(self):
+        calling, called = self.parse()
+        if self.table is not None and self.table.graph is not None:
+            self.graph = self.table.graph
+            self.counts = None
+        else:
+            self.build_calls(calling, called)
 
-    def max_acquaintances(self):
-        results = collections.defaultdict(int)
+    def run(self, workers=None, index=None):
+        """
+        Return the max acquaintances of the file calls or, when an
+        AcquaintanceIndex is given, of the index once they are added.
+        """
+        if index is not None:
+            index.add_calls(*self.parse())
+            return index.max_acquaintances()
+        self.load()
+        return self.max_acquaintances(workers)
+
+    def build_calls(self, calling_numbers, called_numbers):
+        self.graph = CallGraph.from_calls(calling_numbers, called_numbers)
+        self.counts = None
 
-        def max_results():
-            """
-            Return the list of  one or more max_acquaintances
-            """
-            max_map = collections.defaultdict(list)
-            for key, value in results.items():
-                max_map[value].append(key)
-            max_key = max(max_map.keys())
-            return max_key, max_map[max_key]
+    def acquaintance_counts(self, workers=None):
+        """
+        Acquaintance counts of the graph vertices, counted once and kept.
+        When workers > 1 they are counted over a local process pool of
+        that size.
+        """
+        if self.counts is None:
+            if workers and workers > 1 and len(self.graph) > 1:
+                self.counts = _parallel_acquaintance_counts(self.graph,
+                                                            workers)
+            else:
+                self.counts = acquaintance_counts(self.graph)
+        return self.counts
 
-        for called, callings in self.aquaintances.items():  # @UnusedVariable
-            if len(callings) > 1:
-                comb = list(itertools.combinations(callings, 2))
-                acq_count = (len(comb) / len(callings)) + 1
-                for calling in callings:
-                    results[calling] += acq_count
+    def max_acquaintances(self, workers=None):
+        """
+        Return the max acquaintances count and the sorted phone numbers
+        with that many acquaintances
+        """
+        max_count, vertices = max_counts(self.acquaintance_counts(workers))
+        return max_count, [self.graph.numbers[vertex] for vertex in vertices]
 
-        return max_results()
+    def top_acquaintances(self, k, workers=None):
+        """
+        The k (phone number, acquaintances count) with the most
+        acquaintances, by decreasing count then increasing number
+        """
+        top = top_counts(self.acquaintance_counts(workers), k)
+        return [(self.graph.numbers[vertex], count) for vertex, count in top]
 
 
 def calc():
@@ -115,23 +935,58 @@ def calc():
             type=str,
             nargs='+',
             help='csv files with call data')
+    parser.add_argument('-w', '--workers', default=None, type=int,
+                        help='number of worker processes')
+    parser.add_argument('-i', '--index', default=None,
+                        help='acquaintance index file the calls are '
+                        'added to, in the files order')
+    parser.add_argument('-k', '--top', default=None, type=int,
+                        help='also list the top K numbers by acquaintances')
+    parser.add_argument('-c', '--convert', action='store_true',
+                        help='convert the csv files to %s binary call '
+                        'files instead' % CALLS_SUFFIX)
 
     args = parser.parse_args()
 
-    print "Computing for the following files: %s." % args.files
-    print "file", "\t" * 4, "max", "\t" * 1, "acquaintances", "\t" * 3, "seconds"
-    print "=" * 15, "\t" * 2, "=" * 3, "\t", "=" * 15, "\t" * 2, "=" * 7
+    if args.convert:
+        for file_name in args.files:
+            if not os.path.isfile(file_name) or is_call_table(file_name):
+                print("skipping file %s " % (file_name))
+                continue
+            output = os.path.splitext(file_name)[0] + CALLS_SUFFIX
+            rejects = convert_calls(file_name, output)
+            print("converted %s to %s, rejected %s" % (
+                file_name, output, dict(rejects)))
+        return
 
-    for file_name in args.files:
-        if not os.path.isfile(file_name):
-            print "skipping file %s " % (file_name)
-            continue
-        start = time.clock()
-        processor = CallProcessor(file_name)
-        acq_count, acq_phones = processor.run()
-        end = time.clock()
-        print "{:10}\t\t\t{:3}\t{:13}\t{:.4}".format(
-                    file_name, acq_count, acq_phones, end - start)
+    print("Computing for the following files: %s." % args.files)
+    print("file", "\t" * 4, "max", "\t" * 1, "acquaintances", "\t" * 3,
+          "seconds")
+    print("=" * 15, "\t" * 2, "=" * 3, "\t", "=" * 15, "\t" * 2, "=" * 7)
+
+    index = AcquaintanceIndex(args.index) if args.index else None
+    try:
+        for file_name in args.files:
+            if not os.path.isfile(file_name):
+                print("skipping file %s " % (file_name))
+                continue
+            start = timeit.default_timer()
+            processor = CallProcessor(file_name)
+            acq_count, acq_phones = processor.run(args.workers, index)
+            end = timeit.default_timer()
+            print("{:10}\t\t\t{:3}\t{:13}\t{:.4}".format(
+                        file_name, acq_count, str(acq_phones), end - start))
+            if args.top:
+                if index is not None:
+                    top = index.top_acquaintances(args.top)
+                else:
+                    top = processor.top_acquaintances(args.top, args.workers)
+                for number, count in top:
+                    print("{:>15}\t{:3}".format(number, count))
+            processor.close()
+    finally:
+        if index is not None:
+            index.close()
 
 if __name__ == '__main__':
     calc()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -#- coding: utf-8 -#-
+"""
+Created on Oct 18, 2026
+
+@author: ajaniv
+
+Benchmark runner for the prime_sum and comb engines.
+
+Each engine is timed over the requested sizes with repeated runs, and
+the min/median seconds per size are reported in JSON.  When a baseline
+(the JSON output of a previous run on the same hardware) is given, the
+run fails if any min time exceeds the baseline min times max ratio.
+
+> benchmark.py -r 5 -o baseline.json
+> benchmark.py -r 5 -b baseline.json --max-ratio 1.5
+> benchmark.py -m comb 1 10 100 999
+
+prime_sum engines are timed for sum_primes(N), and skipped for sizes
+above their practical bound: trial division takes minutes at 10 ** 7.
+comb engines count the ways for a target of N dollars for every
+currency of comb.CURRENCY_DENOMS: one DP per currency (scalar) against
+the batch generating function engine (batch).
+"""
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import unittest
+
+import comb
+import prime_sum
+
+PRIME_SUM = 'prime_sum'
+COMB = 'comb'
+ENGINES = collections.OrderedDict([
+    (PRIME_SUM, ('trial', 'sieve', 'workers', 'lucy', 'table')),
+    (COMB, ('scalar', 'batch')),
+])
+DEFAULT_SIZES = {
+    PRIME_SUM: [10 ** power for power in range(2, 8)],
+    COMB: [1, 10, 100, 999],
+}
+DEFAULT_REPEAT = 5
+DEFAULT_MAX_RATIO = 1.5
+# baseline times below this many seconds are too noisy to compare
+MIN_BASELINE_SECONDS = 0.001
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_benchmark(self):
+        results = run_benchmark([100, 1000], ['trial', 'sieve', 'table'],
+                                repeat=2)
+        self.assertEqual(['sieve', 'table', 'trial'], sorted(results))
+        for timings in results.values():
+            self.assertEqual(['100', '1000'], sorted(timings))
+            for timing in timings.values():
+                self.assertEqual(2, timing['runs'])
+                self.assertTrue(timing['min'] <= timing['median'])
+
+    def test_run_comb_benchmark(self):
+        results = run_benchmark([1, 5], repeat=1, module=COMB)
+        self.assertEqual(['scalar', 'batch'], list(results))
+        self.assertEqual(['1', '5'], list(results['batch']))
+
+    def test_check_regressions(self):
+        baseline = {'sieve': {'1000': {'min': 0.01, 'median': 0.01}}}
+        results = {'sieve': {'1000': {'min': 0.012, 'median': 0.02},
+                             '100': {'min': 0.5, 'median': 0.5}},
+                   'lucy': {'1000': {'min': 0.5, 'median': 0.5}}}
+        self.assertEqual([], check_regressions(results, baseline, 1.5))
+        self.assertEqual(1, len(check_regressions(results, baseline, 1.1)))
+
+
+class Engines(object):
+    """
+    Engines by name, with the largest size each one is run for
+    """
+    def __init__(self, largest):
+        self.largest = largest
+        self.value_sets = list(comb.CURRENCY_DENOMS.values())
+        self.table_dir = None
+        self.table = None
+
+    def close(self):
+        if self.table is not None:
+            self.table.close()
+        if self.table_dir is not None:
+            shutil.rmtree(self.table_dir)
+
+    def _table(self):
+        if self.table is None:
+            self.table_dir = tempfile.mkdtemp()
+            file_name = os.path.join(self.table_dir, 'prime_sum.table')
+            prime_sum.build_prime_table(file_name,
+                                        min(self.largest,
+                                            prime_sum.MAX_NUMBER))
+            self.table = prime_sum.PrimeTable(file_name)
+        return self.table
+
+    def engines(self, module=PRIME_SUM):
+        if module == COMB:
+            return self.comb_engines()
+        workers = multiprocessing.cpu_count()
+        return collections.OrderedDict([
+            ('trial', (prime_sum.trial_sum_primes, 10 ** 5)),
+            ('sieve', (prime_sum.sum_primes, prime_sum.MAX_NUMBER)),
+            ('workers', (lambda number: prime_sum.sum_primes(
+                number, workers=workers), prime_sum.MAX_NUMBER)),
+            ('lucy', (lambda number: prime_sum.sum_primes(
+                number, method=prime_sum.LUCY), None)),
+            ('table', (lambda number: prime_sum.sum_primes(
+                number, table=self._table()), prime_sum.MAX_NUMBER)),
+        ])
+
+    def comb_engines(self):
+        largest = comb.MAX_TARGET - 1
+        return collections.OrderedDict([
+            ('scalar', (lambda target: [
+                comb.comb_count(values, target)
+                for values in self.value_sets], largest)),
+            ('batch', (lambda target: comb.comb_counts_many(
+                self.value_sets, [target]), largest)),
+        ])
+
+
+def time_engine(function, number, repeat):
+    """
+    Seconds taken by each of repeat calls of function(number)
+    """
+    timings = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        function(number)
+        timings.append(timeit.default_timer() - start)
+    return timings
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run_benchmark(sizes, engines=None, repeat=DEFAULT_REPEAT,
+                  module=PRIME_SUM):
+    """
+    Return {engine: {size: {'min', 'median', 'runs'}}}, sizes as strings
+    to match the JSON representation.
+    """
+    engines = engines or ENGINES[module]
+    available = Engines(max(sizes))
+    try:
+        functions = available.engines(module)
+        results = collections.OrderedDict()
+        for name in engines:
+            function, largest = functions[name]
+            timings = results[name] = collections.OrderedDict()
+            for size in sizes:
+                if largest is not None and size > largest:
+                    continue
+                # warm up, builds the table for the table engine
+                function(size)
+                runs = time_engine(function, size, repeat)
+                timings[str(size)] = {'min': min(runs),
+                                      'median': median(runs),
+                                      'runs': repeat}
+        return results
+    finally:
+        available.close()
+
+
+def check_regressions(results, baseline, max_ratio=DEFAULT_MAX_RATIO):
+    """
+    Messages for each engine and size whose min time exceeds the
+    baseline min time by more than max_ratio
+    """
+    regressions = []
+    for name, timings in results.items():
+        for size, timing in timings.items():
+            reference = baseline.get(name, {}).get(size)
+            if reference is None or reference['min'] < MIN_BASELINE_SECONDS:
+                continue
+            ratio = timing['min'] / reference['min']
+            if ratio > max_ratio:
+                regressions.append(
+                    "%s(%s): %.4g seconds, %.2f times the baseline %.4g" % (
+                        name, size, timing['min'], ratio, reference['min']))
+    return regressions
+
+
+def calc():
+    """
+    Process user input, run the benchmark, check against the baseline
+    """
+    parser = argparse.ArgumentParser(description='Benchmark engines.')
+    parser.add_argument('sizes', metavar='N', type=int, nargs='*',
+                        help='input numbers')
+    parser.add_argument('-m', '--module', default=PRIME_SUM, choices=ENGINES,
+                        help='module whose engines are timed')
+    parser.add_argument('-e', '--engines', nargs='+',
+                        choices=[name for names in ENGINES.values()
+                                 for name in names],
+                        help='engines to time, all the module ones by default')
+    parser.add_argument('-r', '--repeat', default=DEFAULT_REPEAT, type=int,
+                        help='runs per engine and size')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON results file')
+    parser.add_argument('-b', '--baseline', default=None,
+                        help='JSON results file of a reference run')
+    parser.add_argument('--max-ratio', default=DEFAULT_MAX_RATIO,
+                        type=float, help='allowed slowdown versus baseline')
+
+    args = parser.parse_args()
+    engines = args.engines or ENGINES[args.module]
+    unknown = set(engines) - set(ENGINES[args.module])
+    if unknown:
+        parser.error("engines %s not in %s" % (sorted(unknown), args.module))
+    results = run_benchmark(args.sizes or DEFAULT_SIZES[args.module],
+                            engines, args.repeat, args.module)
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(report)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = check_regressions(results, json.load(baseline),
+                                            args.max_ratio)
+        for regression in regressions:
+            print("regression: %s" % regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    calc()
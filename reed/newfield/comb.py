@@ -47,6 +47,26 @@ Caution: only the first two targets have a complete set of results
 with the current implementation using the combination limit approach
 to constrain the number of computations.
 
+The enumeration is kept as enumerate_comb_count. comb_count now converts
+the amounts to integer cents and counts with the coin change dynamic
+programming algorithm, which is exact and needs no limit:
+
+> comb.py .10 .20 .50 1.00  5.00 10.00 25.00 50.00 100 500 999.99
+
+Target         comb_count(N)         seconds
+==========     =============         =======
+      0.10                4        6.4e-05
+      0.20                9        3e-05
+      0.50               49        3.9e-05
+      1.00              243        6.5e-05
+      5.00            35222        0.00033
+     10.00           474189        0.000758
+     25.00         25814674        0.002466
+     50.00        888601247        0.005577
+    100.00      48820947959        0.01257
+    500.00  3584010617516761       0.07693
+    999.99  951260337517571950     0.1006
+
 Thoughts on  performance improvements:
 - Implement in C++
 - Re-engineer the algorithm (likely at the cost of readability.
@@ -55,8 +75,16 @@ Thoughts on  performance improvements:
 - Using grid of compute engines
 '''
 
+from __future__ import print_function
+
 import argparse
-import time
+import array
+import collections
+import mmap
+import multiprocessing
+import struct
+import tempfile
+import timeit
 import unittest
 from itertools import combinations_with_replacement
 
@@ -64,9 +92,32 @@ MAX_TARGET = 1000
 MIN_TARGET = 0
 MAX_LIMIT = 50
 EPSILON = .0001
+DENOMS = [100, 50, 20, 10, 5, 1, 0.25, .10, 0.05, 0.01]
+CURRENCY_DENOMS = collections.OrderedDict([
+    ('USD', DENOMS),
+    ('EUR', [500, 200, 100, 50, 20, 10, 5, 2, 1, .50, .20, .10, .05, .02,
+             .01]),
+    ('GBP', [50, 20, 10, 5, 2, 1, .50, .20, .10, .05, .02, .01]),
+    ('CAD', [100, 50, 20, 10, 5, 2, 1, .25, .10, .05]),
+])
+TABLE_MAGIC = b'COMB'
+TABLE_VERSION = 1
+# magic, version, number of counts, number of denominations
+TABLE_HEADER = struct.Struct('<4sIQQ')
+# denominations in cents and counts, fixed width
+TABLE_ENTRY = struct.Struct('<Q')
+# value set chunks handed out per worker
+CHUNKS_PER_WORKER = 1
+# iter_combinations orders
+LARGEST_FIRST = 'largest'
+SMALLEST_FIRST = 'smallest'
+ORDERS = (LARGEST_FIRST, SMALLEST_FIRST)
+# unreachable amount marker in the minimum pieces tables
+UNREACHABLE = (1 << 31) - 1
 
 
 class TestComb(unittest.TestCase):
+    denoms = DENOMS
 
     def test_comb(self):
         target = .10
@@ -84,14 +135,455 @@ class TestComb(unittest.TestCase):
                   if abs(sum(comb) - target) < epsilon]
         self.assertEqual(results, expected_results)
         self.assertEqual(len(results), len(expected_results))
-        self.assertEqual(comb_count(denoms, target, epsilon),
+        self.assertEqual(comb_count(denoms, target),
+                         len(expected_results))
+        self.assertEqual(enumerate_comb_count(denoms, target, epsilon=epsilon),
                          len(expected_results))
 
+    def test_comb_count(self):
+        # the enumeration limit is not reached for these targets
+        for target in (.01, .10, .20, .37):
+            self.assertEqual(enumerate_comb_count(self.denoms, target),
+                             comb_count(self.denoms, target))
+        self.assertEqual(243, comb_count(self.denoms, 1.00))
+        self.assertEqual(951260337517571950, comb_count(self.denoms, 999.99))
+
+    def test_invalid_comb_count(self):
+        for values, target in ((None, 1), ([], 1), ([1], 0), ([1], None),
+                               ([0.001], 1), ([0], 1)):
+            self.assertRaises(ValueError, comb_count, values, target)
+
+    def test_comb_counts(self):
+        targets = [1.00, .10, 999.99, .10, 25]
+        self.assertEqual([comb_count(self.denoms, target)
+                          for target in targets],
+                         comb_counts(self.denoms, targets))
+        self.assertEqual([], comb_counts(self.denoms, []))
+        self.assertRaises(ValueError, comb_counts, self.denoms, [1, 0])
+
+    def test_max_pieces(self):
+        # enumerate_comb_count limit excludes the limit itself
+        for max_pieces in range(0, 12):
+            self.assertEqual(
+                enumerate_comb_count(self.denoms, .37, limit=max_pieces + 1),
+                comb_count(self.denoms, .37, max_pieces=max_pieces))
+        self.assertEqual(comb_count(self.denoms, 5),
+                         comb_count(self.denoms, 5, max_pieces=500))
+        targets = [1, 200, .25, 7.35]
+        self.assertEqual([comb_count(self.denoms, target, max_pieces=3)
+                          for target in targets],
+                         comb_counts(self.denoms, targets, max_pieces=3))
+        self.assertRaises(ValueError, comb_count, self.denoms, 1,
+                          max_pieces=-1)
+
+    def test_iter_combinations(self):
+        combinations = iter_combinations([.05, 0.01, .10, .05], .10)
+        self.assertEqual([(1, 0, 0), (0, 2, 0), (0, 1, 5), (0, 0, 10)],
+                         list(combinations))
+        self.assertEqual([(0, 0, 10), (0, 1, 5), (0, 2, 0), (1, 0, 0)],
+                         list(iter_combinations([.10, .05, .01], .10,
+                                                order=SMALLEST_FIRST)))
+        self.assertEqual(comb_count(self.denoms, 1.00),
+                         len(list(iter_combinations(self.denoms, 1.00))))
+        self.assertEqual(comb_count(self.denoms, 3.75, max_pieces=12),
+                         len(list(iter_combinations(self.denoms, 3.75,
+                                                    max_pieces=12))))
+        self.assertEqual([], list(iter_combinations([.10, .05], .12)))
+        first = next(iter_combinations(self.denoms, 999.99))
+        self.assertEqual((9, 1, 2, 0, 1, 4, 3, 2, 0, 4), first)
+        self.assertRaises(ValueError, next,
+                          iter_combinations(self.denoms, 1, order='any'))
+
+    def test_comb_counts_many(self):
+        value_sets = list(CURRENCY_DENOMS.values()) + [[.03, .07], [2]]
+        targets = [.10, 1, 999.99, 2.5]
+        self.assertEqual([comb_counts(values, targets)
+                          for values in value_sets],
+                         comb_counts_many(value_sets, targets))
+        self.assertEqual([], comb_counts_many([], targets))
+        self.assertEqual([[]], comb_counts_many([DENOMS], []))
+
+    def test_comb_counts_parallel(self):
+        value_sets = list(CURRENCY_DENOMS.values()) * 2 + [[.03, .07]]
+        targets = [.10, 1, 99.99, 2.5]
+        self.assertEqual(comb_counts_many(value_sets, targets),
+                         comb_counts_parallel(value_sets, targets, workers=2))
+        self.assertEqual(comb_counts_many(value_sets, targets),
+                         comb_counts_parallel(value_sets, targets))
+
+    def test_comb_table(self):
+        with tempfile.NamedTemporaryFile() as table_file:
+            build_comb_table(table_file.name, self.denoms, 20)
+            with CombTable(table_file.name) as table:
+                self.assertEqual(2000, table.size)
+                for target in (.01, .10, 1.00, 19.99):
+                    self.assertEqual(comb_count(self.denoms, target),
+                                     comb_count(self.denoms, target,
+                                                table=table))
+                    self.assertEqual(comb_count(self.denoms, target),
+                                     table.comb_count(target))
+                # not covered by the table: computed
+                self.assertEqual(comb_count(self.denoms, 20),
+                                 comb_count(self.denoms, 20, table=table))
+                self.assertEqual(4, comb_count([.10, .05, .01], .10,
+                                               table=table))
+                self.assertRaises(ValueError, table.comb_count, 20)
+
+    def test_cents(self):
+        self.assertEqual(29, to_cents(.29))
+        self.assertEqual(99999, to_cents(999.99))
+        self.assertRaises(ValueError, to_cents, 0.015)
+
+
+def to_cents(value):
+    """
+    Convert an amount in dollars to an integer number of cents
+    """
+    cents = int(round(value * 100))
+    if abs(value * 100 - cents) > EPSILON:
+        raise ValueError("amount %s is not a whole number of cents" % value)
+    return cents
+
+
+def change_ways(cents, target):
+    """
+    Coin change dynamic programming: ways[amount] counts the combinations
+    of the values in cents processed so far adding up to amount; adding
+    value allows ways[amount - value] more.
+    Return the ways for all the amounts up to target cents.
+    """
+    ways = [1] + [0] * target
+    for value in sorted(cents):
+        for amount in range(value, target + 1):
+            ways[amount] += ways[amount - value]
+    return ways
+
+
+def change_ways_pieces(cents, target, max_pieces):
+    """
+    Coin change dynamic programming over (pieces, amount): the number of
+    combinations of exactly k pieces adding up to amount, for k in
+    [0, max_pieces], is packed as a polynomial in pieces into the python
+    integer ways[amount], one width bits field per k.  Adding a piece
+    of value shifts ways[amount - value] up by one field, and truncates
+    beyond max_pieces, so the pieces axis is updated as a whole.
+    Return ways for all the amounts up to target cents, and width.
+    """
+    # no count exceeds the unbounded number of ways
+    width = max(max(change_ways(cents, target)).bit_length(), 1)
+    mask = (1 << (width * (max_pieces + 1))) - 1
+    ways = [1] + [0] * target
+    for value in sorted(cents):
+        for amount in range(value, target + 1):
+            ways[amount] += (ways[amount - value] << width) & mask
+    return ways, width
+
+
+def pieces_count(packed, width, max_pieces):
+    """
+    Sum the counts of 1 to max_pieces pieces of a change_ways_pieces entry
+    """
+    field = (1 << width) - 1
+    return sum((packed >> (pieces * width)) & field
+               for pieces in range(1, max_pieces + 1))
+
+
+def bounded_pieces(cents, targets, max_pieces):
+    """
+    max_pieces for the targets in cents, or None when the bound can not
+    be reached and the unbounded count applies
+    """
+    if max_pieces is None:
+        return None
+    if max_pieces < 0:
+        raise ValueError("invalid max pieces %s" % max_pieces)
+    if targets and max_pieces >= max(targets) // cents[0]:
+        return None
+    return max_pieces
+
+
+def denomination_cents(values):
+    """
+    Distinct values converted to cents, sorted
+    """
+    if values == None or not len(values):
+        raise ValueError
+    cents = sorted(set(to_cents(value) for value in values))
+    if cents[0] <= 0:
+        raise ValueError("invalid values %s" % values)
+    return cents
+
+
+def comb_count(values, target, table=None, max_pieces=None):
+    """
+    Number of ways to represent target with any number of each of the
+    values, all amounts being converted to integer cents.
+
+    O(len(values) * target cents) time, exact with python integers,
+    see change_ways.  When a CombTable built for the same values and
+    covering target is given, the result is looked up instead.
+
+    With max_pieces, only the ways using at most that many coins or
+    notes are counted, see change_ways_pieces.
+    """
+    if target is None or target <= 0:
+        raise ValueError
+
+    cents = denomination_cents(values)
+    target = to_cents(target)
+    max_pieces = bounded_pieces(cents, [target], max_pieces)
+    if max_pieces is not None:
+        ways, width = change_ways_pieces(cents, target, max_pieces)
+        return pieces_count(ways[target], width, max_pieces)
+    if table is not None and table.covers(cents, target):
+        return table.count(target)
+    return change_ways(cents, target)[target]
+
+
+def comb_counts(values, targets, max_pieces=None):
+    """
+    Number of ways to represent each of the targets, see comb_count.
+    A single dynamic programming pass up to the largest target is shared
+    by all of them.
+    """
+    if any(target is None or target <= 0 for target in targets):
+        raise ValueError
+
+    cents = denomination_cents(values)
+    targets = [to_cents(target) for target in targets]
+    if not targets:
+        return []
+    max_pieces = bounded_pieces(cents, targets, max_pieces)
+    if max_pieces is not None:
+        ways, width = change_ways_pieces(cents, max(targets), max_pieces)
+        return [pieces_count(ways[target], width, max_pieces)
+                for target in targets]
+    ways = change_ways(cents, max(targets))
+    return [ways[target] for target in targets]
+
+
+def comb_counts_many(value_sets, targets):
+    """
+    Number of ways to represent each of the targets for each of the
+    value sets: one list of counts per value set, see comb_count.
+
+    Generating functions: the counts are the coefficients of the product
+    of 1 / (1 - x ** value) over the values of a set, truncated to the
+    largest target.  The polynomials of all the sets are multiplied in a
+    single pass: ways[amount] packs the coefficient of every set into
+    fixed width fields of one python integer, and each distinct value
+    multiplies only the fields of the sets holding it (a mask).  The
+    cost is O(distinct values * target cents) rather than
+    O(sum of set sizes * target cents).
+    """
+    if any(target is None or target <= 0 for target in targets):
+        raise ValueError
+
+    cents_sets = [denomination_cents(values) for values in value_sets]
+    targets = [to_cents(target) for target in targets]
+    if not targets or not cents_sets:
+        return [[] for _ in cents_sets]
+    top = max(targets)
+    # the ways are bounded by the product of the possible counts per value
+    width = max(sum((top // value + 1).bit_length() for value in cents)
+                for cents in cents_sets)
+    field = (1 << width) - 1
+    masks = collections.defaultdict(int)
+    for position, cents in enumerate(cents_sets):
+        for value in cents:
+            masks[value] |= field << (position * width)
+
+    ways = [0] * (top + 1)
+    ways[0] = sum(1 << (position * width)
+                  for position in range(len(cents_sets)))
+    for value in sorted(masks):
+        mask = masks[value]
+        for amount in range(value, top + 1):
+            ways[amount] += ways[amount - value] & mask
+    return [[(ways[target] >> (position * width)) & field
+             for target in targets]
+            for position in range(len(cents_sets))]
+
+
+def _comb_counts_job(job):
+    value_sets, targets = job
+    return comb_counts_many(value_sets, targets)
+
+
+def comb_counts_parallel(value_sets, targets, workers=None):
+    """
+    comb_counts_many distributed over a local process pool of workers:
+    the value sets are split in contiguous chunks, one job per chunk
+    (CHUNKS_PER_WORKER per worker), so that only the sets, targets
+    and counts are pickled.  Results are in the value sets order.
+    """
+    value_sets = list(value_sets)
+    if not workers or workers <= 1 or len(value_sets) <= 1:
+        return comb_counts_many(value_sets, targets)
+
+    chunks = min(len(value_sets), workers * CHUNKS_PER_WORKER)
+    per_chunk = (len(value_sets) + chunks - 1) // chunks
+    jobs = [(value_sets[start:start + per_chunk], targets)
+            for start in range(0, len(value_sets), per_chunk)]
+    pool = multiprocessing.Pool(workers)
+    try:
+        return [counts for chunk in pool.map(_comb_counts_job, jobs)
+                for counts in chunk]
+    finally:
+        pool.close()
+        pool.join()
+
+
+def min_pieces_tables(cents, target):
+    """
+    For cents sorted in decreasing order, tables[i][amount] is the
+    minimum number of pieces of cents[i:] adding up to amount, or
+    UNREACHABLE.
+    """
+    tables = []
+    following = array.array('i', [0] + [UNREACHABLE] * target)
+    for value in reversed(cents):
+        table = array.array('i', following)
+        for amount in range(value, target + 1):
+            pieces = table[amount - value] + 1
+            if pieces < table[amount]:
+                table[amount] = pieces
+        tables.append(table)
+        following = table
+    tables.reverse()
+    return tables
+
+
+def iter_combinations(values, target, order=LARGEST_FIRST, max_pieces=None):
+    """
+    Lazily yield the ways to represent target as tuples of counts of the
+    distinct values, sorted in decreasing order.
+
+    LARGEST_FIRST starts from the largest values (for the usual currency
+    denominations, the first way uses the fewest pieces), SMALLEST_FIRST
+    from the smallest ones.  With max_pieces, only the ways using at
+    most that many pieces are yielded.
+
+    Branches are pruned with the minimum number of pieces needed for the
+    remaining amount (see min_pieces_tables), so no dead end is explored
+    and each way costs O(len(values)) steps; memory is bounded by the
+    tables, whatever the number of ways.
+    """
+    if order not in ORDERS:
+        raise ValueError("unknown order %s" % order)
+    if target is None or target <= 0:
+        raise ValueError
+    if max_pieces is not None and max_pieces < 0:
+        raise ValueError("invalid max pieces %s" % max_pieces)
+
+    cents = denomination_cents(values)[::-1]
+    target = to_cents(target)
+    tables = min_pieces_tables(cents, target)
+    budget = UNREACHABLE - 1 if max_pieces is None else max_pieces
+    counts = [0] * len(cents)
+    last = len(cents) - 1
+
+    def visit(index, remaining, budget):
+        value = cents[index]
+        if index == last:
+            counts[index] = remaining // value
+            yield tuple(counts)
+            return
+        most = min(remaining // value, budget)
+        if order == LARGEST_FIRST:
+            choices = range(most, -1, -1)
+        else:
+            choices = range(most + 1)
+        following = tables[index + 1]
+        for count in choices:
+            rest = remaining - count * value
+            if following[rest] <= budget - count:
+                counts[index] = count
+                for counts_tuple in visit(index + 1, rest, budget - count):
+                    yield counts_tuple
+
+    if tables[0][target] <= budget:
+        for counts_tuple in visit(0, target, budget):
+            yield counts_tuple
+
+
+def build_comb_table(file_name, values=DENOMS, max_target=MAX_TARGET):
+    """
+    Write the counts for all the targets below max_target (in dollars)
+    for values.  Layout (little endian): header, the values in cents,
+    then one uint64 count per cent amount.
+    """
+    cents = denomination_cents(values)
+    size = to_cents(max_target)
+    ways = change_ways(cents, size - 1)
+    if ways and max(ways) >= 1 << 64:
+        raise ValueError("counts do not fit in 64 bits")
+    with open(file_name, 'wb') as table_file:
+        table_file.write(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, size,
+                                           len(cents)))
+        for value in cents + ways:
+            table_file.write(TABLE_ENTRY.pack(value))
+
+
+class CombTable(object):
+    """
+    Read only, memory mapped view of a table written by build_comb_table.
+    The pages are shared through the OS page cache, opening is O(1).
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as table_file:
+            self.buffer = mmap.mmap(table_file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        magic, version, self.size, values = TABLE_HEADER.unpack_from(
+            self.buffer, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            self.close()
+            raise ValueError("invalid comb table %s" % file_name)
+        self.cents = [TABLE_ENTRY.unpack_from(
+                          self.buffer,
+                          TABLE_HEADER.size + index * TABLE_ENTRY.size)[0]
+                      for index in range(values)]
+        self.counts_offset = (TABLE_HEADER.size +
+                              values * TABLE_ENTRY.size)
 
-def comb_count(values, target, limit=None, epsilon=None):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+
+    def covers(self, cents, target):
+        """
+        Whether target cents can be looked up for the values in cents
+        """
+        return cents == self.cents and 0 <= target < self.size
+
+    def count(self, target):
+        """
+        Number of ways for target cents
+        """
+        return TABLE_ENTRY.unpack_from(
+            self.buffer, self.counts_offset + target * TABLE_ENTRY.size)[0]
+
+    def comb_count(self, target):
+        """
+        Number of ways for target in dollars
+        """
+        target = to_cents(target)
+        if not 0 <= target < self.size:
+            raise ValueError("target %s not in table" % target)
+        return self.count(target)
+
+
+def enumerate_comb_count(values, target, limit=None, epsilon=None):
     """
     Combination with replacement counter for
-    a set of values
+    a set of values.  Kept as a reference implementation,
+    it is exact only while the limit is not reached.
 
     The method was profiled using python profiler, and efforts
     to improve the performance failed.  Had to introduce concept
@@ -126,31 +618,82 @@ def calc():
     parser = argparse.ArgumentParser(description='Denomination combinations.')
     parser.add_argument('targets', metavar='N', type=float, nargs='+',
                        help='Target number (0 < N < 1000)')
-    parser.add_argument('-l', '--limit', default=MAX_LIMIT, type=int,
-                        help='combination with replacement limit')
+    parser.add_argument('-t', '--table', default=None,
+                        help='change count table file to answer from')
+    parser.add_argument('-b', '--build-table', action='store_true',
+                        help='build the change count table file first')
+    parser.add_argument('-k', '--max-pieces', default=None, type=int,
+                        help='count only the ways using at most K pieces')
+    parser.add_argument('-c', '--currency', '--currencies', dest='currencies',
+                        action='append', choices=CURRENCY_DENOMS,
+                        help='currency whose denominations are used, '
+                        'USD by default; repeat for several currencies')
+    parser.add_argument('-w', '--workers', default=None, type=int,
+                        help='number of worker processes')
 
     args = parser.parse_args()
-    denoms = [100, 50, 20, 10, 5, 1, 0.25, .10, 0.05, 0.01]
+    args.currencies = args.currencies or ['USD']
+    multiple = len(args.currencies) > 1 or args.workers
+    if multiple and (args.table or args.max_pieces is not None):
+        parser.error('table and max pieces apply to a single currency')
+    denoms = CURRENCY_DENOMS[args.currencies[0]]
+    table = None
+    if args.table:
+        if args.build_table:
+            print("Building change count table %s." % args.table)
+            build_comb_table(args.table, denoms)
+        table = CombTable(args.table)
 
-    limit = args.limit
-    if limit > MAX_LIMIT:
-        raise ValueError("invalid limit value %s > %s " % (limit, MAX_LIMIT))
-
-    print "Using combination with replacement limit: %s." % limit
-    print "Computing for the following targets: %s.\n" % args.targets
-
-    print "Target", "\t" * 2, "comb_count(N)", "\t" * 2,  "seconds"
-    print "=" * 10, "\t" * 1, "=" * 13, "\t" * 2, "=" * 7
+    print("Computing for the following targets: %s.\n" % args.targets)
 
+    targets = []
     for target in args.targets:
         if target >= MAX_TARGET or target <= MIN_TARGET:
-            print 'ignoring invalid target: ', target
+            print('ignoring invalid target: ', target)
             continue
-        start = time.clock()
-        result = comb_count(denoms, target, limit=limit, epsilon=EPSILON)
-        end = time.clock()
-        print "{:>10.2f}\t{:>13}\t\t{:.4}".format(
-                    target, result, end - start)
+        targets.append(target)
+
+    batch = multiple or (len(targets) > 1 and (
+        table is None or args.max_pieces is not None))
+    if batch:
+        # the batch is timed as a whole
+        print("Target", "\t" * 2, "comb_count(N)")
+        print("=" * 10, "\t" * 1, "=" * 13)
+    else:
+        print("Target", "\t" * 2, "comb_count(N)", "\t" * 2,  "seconds")
+        print("=" * 10, "\t" * 1, "=" * 13, "\t" * 2, "=" * 7)
+
+    if multiple:
+        # one job per chunk of currencies
+        start = timeit.default_timer()
+        results = comb_counts_parallel(
+            [CURRENCY_DENOMS[currency] for currency in args.currencies],
+            targets, args.workers)
+        end = timeit.default_timer()
+        for currency, counts in zip(args.currencies, results):
+            print("Currency: %s" % currency)
+            for target, result in zip(targets, counts):
+                print("{:>10.2f}\t{:>13}".format(target, result))
+        print("Total seconds: {:.4}".format(end - start))
+        return
+
+    if batch:
+        # single dynamic programming pass for all the targets
+        start = timeit.default_timer()
+        results = comb_counts(denoms, targets, max_pieces=args.max_pieces)
+        end = timeit.default_timer()
+        for target, result in zip(targets, results):
+            print("{:>10.2f}\t{:>13}".format(target, result))
+        print("Total seconds: {:.4}".format(end - start))
+        return
+
+    for target in targets:
+        start = timeit.default_timer()
+        result = comb_count(denoms, target, table=table,
+                            max_pieces=args.max_pieces)
+        end = timeit.default_timer()
+        print("{:>10.2f}\t{:>13}\t\t{:.4}".format(
+                    target, result, end - start))
 
 if __name__ == '__main__':
     calc()
@@ -1,2 +0,0 @@
-import pstats
-pstats.Stats('comb.stat').strip_dirs().sort_stats("cumulative").print_stats()
@@ -16,7 +16,7 @@ When ran with the following arguments:
 >prime_sum.py -1 0 1 2  100  1000 10000 100000 1000000  10000000
 
 
-Results produced:
+Results produced (trial division, the original implementation):
 N                  sum_primes(N)         seconds
 ==========         =============         =======
         -1                    0            4e-06
@@ -30,8 +30,28 @@ N                  sum_primes(N)         seconds
    1000000          37550402023            7.034
   10000000        3203324994356            206.0
 
+Results produced (segmented Sieve of Eratosthenes):
+N                  sum_primes(N)         seconds
+==========         =============         =======
+        -1                    0            5e-06
+         0                    0            1e-06
+         1                    0            1e-06
+         2                    0            0.0
+       100                 1060            4.4e-05
+      1000                76127            5.5e-05
+     10000              5736396            0.000332
+    100000            454396537            0.002934
+   1000000          37550402023            0.02028
+  10000000        3203324994356            0.2336
 
+Note: the original implementation wrongly returned 2 for N = 2.
 
+The timings above are indicative only; benchmark.py reproduces them
+for every engine on the local hardware, and checks for regressions.
+
+Beyond MAX_NUMBER, the sublinear method (-m lucy) sums the primes
+below 10 ** 10 in about 3 seconds, and below 10 ** 12 in under
+2 minutes, in O(sqrt N) memory.
 
 
 How to improve performance:
@@ -43,12 +63,72 @@ How to improve performance:
   the same arguments.
 """
 
+from __future__ import print_function
+
 import argparse
-import time
+import bisect
+import collections
 import math
+import functools
+import itertools
+import mmap
+import operator
+import sqlite3
+import struct
+import multiprocessing
+import multiprocessing.sharedctypes
+import tempfile
+import timeit
 import unittest
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
 
 MAX_NUMBER = 10000000
+SIEVE = 'sieve'
+LUCY = 'lucy'
+METHODS = (SIEVE, LUCY)
+# bumped whenever a change affects sum_primes results; keys the disk cache
+ALGORITHM_VERSION = 1
+# in process cache entries
+CACHE_SIZE = 1024
+# odd numbers per sieve segment, one byte each (fits a 32K L1 data cache)
+SEGMENT_SIZE = 1 << 15
+# sieve ranges handed out per worker, for load balancing
+CHUNKS_PER_WORKER = 4
+# numbers covered by each prime table checkpoint
+TABLE_BLOCK_SIZE = 1 << 16
+TABLE_MAGIC = b'PSUM'
+TABLE_VERSION = 2
+# magic, version, limit, block size, number of checkpoints
+TABLE_HEADER = struct.Struct('<4sIQQQ')
+TABLE_CHECKPOINT = struct.Struct('<Q')
+# positions of the bits set in each byte value
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1)
+             for value in range(256)]
+BYTE_COUNTS = [len(bits) for bits in BYTE_BITS]
+# mod 30 wheel: only 8 residues can be prime beyond 2, 3 and 5,
+# each byte holds the numbers 30 * k + WHEEL_RESIDUES[bit]
+WHEEL = 30
+WHEEL_PRIMES = (2, 3, 5)
+WHEEL_RESIDUES = (1, 7, 11, 13, 17, 19, 23, 29)
+WHEEL_BITS = [WHEEL_RESIDUES.index(residue)
+              if residue in WHEEL_RESIDUES else None
+              for residue in range(WHEEL)]
+# masks of the residues >= r and < r, for r in [0, 30]
+WHEEL_LOW_MASKS = [sum(1 << bit for bit, residue in enumerate(WHEEL_RESIDUES)
+                       if residue >= r) for r in range(WHEEL + 1)]
+WHEEL_HIGH_MASKS = [0xff ^ mask for mask in WHEEL_LOW_MASKS]
+# bitmap bytes read at a time when scanning
+BITMAP_CHUNK_SIZE = 1 << 12
+# is_prime_many: trial division bound, then Miller-Rabin witnesses
+TRIAL_DIVISION_LIMIT = 200
+# deterministic for n < 2 ** 64 (Jim Sinclair)
+MILLER_RABIN_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+# the first 13 primes, deterministic for n < 3.3 * 10 ** 24 (psi 13),
+# probabilistic beyond
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
 
 
 class TestPrime(unittest.TestCase):
@@ -70,9 +150,109 @@ class TestPrime(unittest.TestCase):
         self.assertEqual(expected_sum, sum_primes(self.input_number))
 
     def test_invalid_sum_primes(self):
-        for num in (-1, 0, 1):
+        for num in (-1, 0, 1, 2):
             self.assertEqual(0, sum_primes(num))
 
+    def test_sum_primes_segments(self):
+        for num in range(2, 400):
+            self.assertEqual(trial_sum_primes(num),
+                             sum_primes(num, segment_size=7))
+
+    def test_sum_primes_large(self):
+        self.assertEqual(454396537, sum_primes(100000))
+
+    def test_sum_primes_workers(self):
+        self.assertEqual(454396537,
+                         sum_primes(100000, segment_size=1000, workers=2))
+        self.assertEqual(sum(self.ref_primes),
+                         sum_primes(self.input_number, workers=2))
+
+    def test_sum_primes_many(self):
+        numbers = [1000, -1, 100, 3, 2, 100000, 1000, 7, 8]
+        self.assertEqual([sum_primes(num) for num in numbers],
+                         sum_primes_many(numbers, segment_size=50))
+        self.assertEqual([], sum_primes_many([]))
+        self.assertRaises(ValueError, sum_primes_many, [5, MAX_NUMBER + 1])
+
+    def test_iter_primes(self):
+        self.assertEqual(self.ref_primes,
+                         list(iter_primes(0, self.input_number,
+                                          segment_size=4)))
+        for low, high in ((-5, 2), (2, 3), (3, 4), (4, 5), (10, 60),
+                          (50, 10), (89, 98)):
+            expected = [num for num in self.ref_primes if low <= num < high]
+            self.assertEqual(expected, list(iter_primes(low, high)))
+            self.assertEqual(len(expected), count_primes(low, high))
+            self.assertEqual(sum(expected), sum_primes_range(low, high))
+        self.assertEqual(664579, count_primes(0, 10000000))
+        self.assertEqual(sum_primes(1000000) - sum_primes(1000),
+                         sum_primes_range(1000, 1000000, segment_size=999))
+
+    def test_is_prime_many(self):
+        numbers = list(range(-5, 3000)) + [40003, 40005]
+        self.assertEqual([is_prime(num) for num in numbers],
+                         is_prime_many(numbers))
+        self.assertEqual([False, True, False, True, False, True],
+                         is_prime_many([561, 2 ** 61 - 1, 3215031751,
+                                        999999999999989, 999999999999991,
+                                        2 ** 89 - 1]))
+
+    def test_lucy_sum_primes(self):
+        for num in range(-1, 2000):
+            self.assertEqual(sum_primes(num),
+                             sum_primes(num, method=LUCY))
+        self.assertEqual(279209790387276,
+                         sum_primes(100000000, method=LUCY))
+        self.assertRaises(ValueError, sum_primes, 100, method='unknown')
+
+    def test_prime_bitmap(self):
+        limit = 1000
+        bitmap = build_prime_bitmap(limit, segment_size=20)
+        self.assertEqual((limit + 29) // 30, len(bitmap.bits))
+        primes = [num for num in range(limit) if is_prime(num)]
+        self.assertEqual(primes, [num for num in range(-1, limit)
+                                  if bitmap.is_prime(num)])
+        self.assertEqual(primes, list(bitmap.iter_primes(0, limit)))
+        for low, high in ((0, 100), (2, 3), (5, 8), (29, 31), (31, 60),
+                          (7, 7), (100, 50), (600, limit)):
+            expected = [num for num in primes if low <= num < high]
+            self.assertEqual(expected, list(bitmap.iter_primes(low, high)))
+            self.assertEqual(len(expected), bitmap.count(low, high))
+        self.assertRaises(ValueError, bitmap.is_prime, limit)
+        self.assertRaises(ValueError, bitmap.count, 0, limit + 1)
+
+    def test_sum_primes_cache(self):
+        with tempfile.NamedTemporaryFile() as cache_file:
+            with SumPrimesCache(2, cache_file.name) as cache:
+                for num in (100, 1000, 100, 10000, 100, 1000):
+                    self.assertEqual(sum_primes(num),
+                                     sum_primes(num, cache=cache))
+                self.assertEqual(
+                    {'hits': 2, 'disk_hits': 1, 'misses': 3},
+                    cache.stats())
+                self.assertEqual([100, 1000], [
+                    key[0] for key in cache.entries])
+            # a new process starts with the disk cache only
+            with SumPrimesCache(2, cache_file.name) as cache:
+                self.assertEqual(76127, sum_primes(1000, cache=cache))
+                self.assertEqual(1060, sum_primes(100, method=LUCY,
+                                                  cache=cache))
+                self.assertEqual(
+                    {'hits': 0, 'disk_hits': 1, 'misses': 1},
+                    cache.stats())
+
+    def test_prime_table(self):
+        for limit in (5000, 64 * 80):
+            with tempfile.NamedTemporaryFile() as table_file:
+                build_prime_table(table_file.name, limit, block_size=64)
+                with PrimeTable(table_file.name) as table:
+                    self.assertEqual(limit, table.limit)
+                    for num in range(-1, limit + 1):
+                        self.assertEqual(sum_primes(num),
+                                         sum_primes(num, table=table))
+                    self.assertRaises(ValueError, table.sum_primes,
+                                      limit + 1)
+
 
 def is_prime(num):
     """
@@ -87,13 +267,14 @@ def is_prime(num):
     return True
 
 
-def sum_primes(input_number):
+def trial_sum_primes(input_number):
     """
-    Sum all prime numbers less than  input number
+    Sum all prime numbers less than  input number using trial division.
+    Kept as a reference implementation for cross-checking results.
     """
 
     total = 0
-    if input_number <= 1:
+    if input_number <= 2:
         return 0
 
     if input_number > MAX_NUMBER:
@@ -108,6 +289,576 @@ def sum_primes(input_number):
     return total + 2
 
 
+def isqrt(num):
+    """
+    Floor of the square root of a non negative integer
+    """
+    root = int(math.sqrt(num))
+    while root * root > num:
+        root -= 1
+    while (root + 1) * (root + 1) <= num:
+        root += 1
+    return root
+
+
+def odd_base_primes(limit):
+    """
+    Odd primes up to and including limit, using a simple
+    Sieve of Eratosthenes over the odd numbers.
+    """
+    if limit < 3:
+        return []
+    # flags[i] represents the odd number 2 * i + 1
+    size = (limit - 1) // 2 + 1
+    flags = bytearray([1]) * size
+    flags[0] = 0
+    for i in range(1, (isqrt(limit) - 1) // 2 + 1):
+        if flags[i]:
+            step = 2 * i + 1
+            start = (step * step) // 2
+            flags[start::step] = bytearray(len(range(start, size, step)))
+    return [2 * i + 1 for i in itertools.compress(range(size), flags)]
+
+
+TRIAL_PRIMES = frozenset([2] + odd_base_primes(TRIAL_DIVISION_LIMIT - 1))
+TRIAL_PRIMES_PRODUCT = functools.reduce(operator.mul, TRIAL_PRIMES)
+
+
+def miller_rabin(num):
+    """
+    Deterministic Miller-Rabin primality test for odd num > 41
+    below 3.3 * 10 ** 24, probabilistic beyond.
+    """
+    bases = MILLER_RABIN_BASES_64 if num < 1 << 64 else MILLER_RABIN_BASES
+    odd, twos = num - 1, 0
+    while not odd & 1:
+        odd >>= 1
+        twos += 1
+    for base in bases:
+        base %= num
+        if not base:
+            continue
+        value = pow(base, odd, num)
+        if value == 1 or value == num - 1:
+            continue
+        for _ in range(twos - 1):
+            value = value * value % num
+            if value == num - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime_many(numbers):
+    """
+    Primality mask of a sequence of integers: trial division by the
+    primes below TRIAL_DIVISION_LIMIT (a single gcd against their
+    product), then Miller-Rabin on the survivors.
+    """
+    bound = TRIAL_DIVISION_LIMIT * TRIAL_DIVISION_LIMIT
+    mask = []
+    for num in numbers:
+        if num < TRIAL_DIVISION_LIMIT:
+            mask.append(num in TRIAL_PRIMES)
+        elif gcd(num, TRIAL_PRIMES_PRODUCT) != 1:
+            mask.append(False)
+        else:
+            mask.append(num < bound or miller_rabin(num))
+    return mask
+
+
+def sieve_segment(low, high, base_primes):
+    """
+    Sieve the odd numbers in [low, high), low being odd.
+    Return a bytearray where flags[i] is set if low + 2 * i is prime.
+    base_primes must contain all the odd primes up to sqrt(high).
+    """
+    size = (high - low + 1) // 2
+    flags = bytearray([1]) * size
+    for prime in base_primes:
+        square = prime * prime
+        if square >= high:
+            break
+        # first odd multiple of prime not below low, skipping prime itself
+        first = max(square, (low + prime - 1) // prime * prime)
+        if not first % 2:
+            first += prime
+        start = (first - low) // 2
+        if start < size:
+            flags[start::prime] = bytearray((size - 1 - start) // prime + 1)
+    return flags
+
+
+def iter_segments(low, high, base_primes, segment_size=SEGMENT_SIZE):
+    """
+    Yield (segment low, segment high, flags) sieving the odd numbers
+    in [low, high), low being odd, one segment of segment_size
+    numbers at a time.
+    """
+    span = 2 * segment_size
+    for seg_low in range(low, high, span):
+        seg_high = min(seg_low + span, high)
+        yield seg_low, seg_high, sieve_segment(seg_low, seg_high,
+                                               base_primes)
+
+
+def sum_odd_range(low, high, base_primes, segment_size=SEGMENT_SIZE):
+    """
+    Sum the odd primes in [low, high), low being odd
+    """
+    total = 0
+    for seg_low, seg_high, flags in iter_segments(low, high, base_primes,
+                                                  segment_size):
+        total += sum(itertools.compress(range(seg_low, seg_high, 2), flags))
+    return total
+
+
+def _prime_segments(low, high, segment_size):
+    """
+    Segments of the odd primes in [low, high), plus whether 2 is in range
+    """
+    has_two = low <= 2 < high
+    low = max(low, 3)
+    low += 1 - low % 2
+    if low >= high:
+        return has_two, iter(())
+    base_primes = odd_base_primes(isqrt(high - 1))
+    return has_two, iter_segments(low, high, base_primes, segment_size)
+
+
+def iter_primes(low, high, segment_size=SEGMENT_SIZE):
+    """
+    Lazily yield the primes in [low, high).  Memory is bounded by
+    the base primes up to sqrt(high) and one segment.
+    """
+    has_two, segments = _prime_segments(low, high, segment_size)
+    if has_two:
+        yield 2
+    for seg_low, seg_high, flags in segments:
+        for prime in itertools.compress(range(seg_low, seg_high, 2), flags):
+            yield prime
+
+
+def count_primes(low, high, segment_size=SEGMENT_SIZE):
+    """
+    Count the primes in [low, high)
+    """
+    has_two, segments = _prime_segments(low, high, segment_size)
+    return int(has_two) + sum(flags.count(b'\x01')
+                              for _, _, flags in segments)
+
+
+def sum_primes_range(low, high, segment_size=SEGMENT_SIZE):
+    """
+    Sum the primes in [low, high)
+    """
+    has_two, segments = _prime_segments(low, high, segment_size)
+    return 2 * has_two + sum(
+        sum(itertools.compress(range(seg_low, seg_high, 2), flags))
+        for seg_low, seg_high, flags in segments)
+
+
+_worker_base_primes = None
+
+
+def _init_worker(base_primes):
+    """
+    Process pool initializer: keep a reference to the shared base primes
+    """
+    global _worker_base_primes
+    _worker_base_primes = base_primes
+
+
+def _sum_odd_range_worker(bounds):
+    low, high, segment_size = bounds
+    return sum_odd_range(low, high, _worker_base_primes, segment_size)
+
+
+def _parallel_sum_odd_range(low, high, base_primes, segment_size, workers):
+    """
+    Split [low, high) into segment aligned ranges and sum them
+    over a process pool.  The base primes are placed once in shared
+    memory, only the range bounds and partial sums are pickled.
+    """
+    span = 2 * segment_size
+    segments = (high - low + span - 1) // span
+    chunks = min(segments, workers * CHUNKS_PER_WORKER)
+    per_chunk = (segments + chunks - 1) // chunks * span
+    bounds = [(chunk_low, min(chunk_low + per_chunk, high), segment_size)
+              for chunk_low in range(low, high, per_chunk)]
+    shared_primes = multiprocessing.sharedctypes.RawArray('l', base_primes)
+    pool = multiprocessing.Pool(workers, _init_worker, (shared_primes,))
+    try:
+        return sum(pool.map(_sum_odd_range_worker, bounds))
+    finally:
+        pool.close()
+        pool.join()
+
+
+class PrimeBitmap(object):
+    """
+    Primality map of the numbers below limit, bit packed over a mod 30
+    wheel: 30 numbers per byte, about 33MB for 10 ** 9.
+    bits is any buffer (bytearray, mmap) holding the map at offset.
+    """
+    def __init__(self, limit, bits, offset=0):
+        self.limit = limit
+        self.bits = bits
+        self.offset = offset
+
+    def is_prime(self, num):
+        if num >= self.limit:
+            raise ValueError("number %s >= %s" % (num, self.limit))
+        if num < WHEEL:
+            if num in WHEEL_PRIMES:
+                return True
+            if num < 2:
+                return False
+        bit = WHEEL_BITS[num % WHEEL]
+        if bit is None:
+            return False
+        return bool(bytearray(self.bits[self.offset + num // WHEEL:
+                                        self.offset + num // WHEEL + 1])[0]
+                    >> bit & 1)
+
+    def _chunks(self, low, high):
+        """
+        Yield (number, chunk) pairs: chunk is a bytearray of the map
+        starting at number, masked to the numbers in [low, high).
+        """
+        if high > self.limit:
+            raise ValueError("number %s > %s" % (high, self.limit))
+        low = max(low, 0)
+        if low >= high:
+            return
+        first, last = low // WHEEL, (high - 1) // WHEEL
+        for start in range(first, last + 1, BITMAP_CHUNK_SIZE):
+            end = min(start + BITMAP_CHUNK_SIZE, last + 1)
+            chunk = bytearray(self.bits[self.offset + start:
+                                        self.offset + end])
+            if start == first:
+                chunk[0] &= WHEEL_LOW_MASKS[low % WHEEL]
+            if end == last + 1:
+                chunk[-1] &= WHEEL_HIGH_MASKS[(high - 1) % WHEEL + 1]
+            yield start * WHEEL, chunk
+
+    def iter_primes(self, low, high):
+        """
+        Yield the primes in [low, high) in increasing order
+        """
+        for prime in WHEEL_PRIMES:
+            if low <= prime < high:
+                yield prime
+        for number, chunk in self._chunks(low, high):
+            for value in chunk:
+                if value:
+                    for bit in BYTE_BITS[value]:
+                        yield number + WHEEL_RESIDUES[bit]
+                number += WHEEL
+
+    def count(self, low, high):
+        """
+        Count the primes in [low, high), by popcount of the map bytes
+        """
+        total = sum(1 for prime in WHEEL_PRIMES if low <= prime < high)
+        for _, chunk in self._chunks(low, high):
+            total += sum(BYTE_COUNTS[value] for value in chunk)
+        return total
+
+
+def build_prime_bitmap(limit, segment_size=SEGMENT_SIZE):
+    """
+    Sieve the numbers below limit into a PrimeBitmap
+    """
+    bits = bytearray((limit + WHEEL - 1) // WHEEL)
+    base_primes = odd_base_primes(isqrt(max(limit - 1, 0)))
+    span = 2 * segment_size
+    # primes below 7 are not stored in the wheel
+    for low in range(7, limit, span):
+        high = min(low + span, limit)
+        flags = sieve_segment(low, high, base_primes)
+        for prime in itertools.compress(range(low, high, 2), flags):
+            bits[prime // WHEEL] |= 1 << WHEEL_BITS[prime % WHEEL]
+    return PrimeBitmap(limit, bits)
+
+
+def build_prime_table(file_name, limit=MAX_NUMBER,
+                      block_size=TABLE_BLOCK_SIZE):
+    """
+    Write the prime sum table for all numbers up to limit.
+
+    Layout (little endian): header, one uint64 checkpoint per block
+    holding the sum of the primes below block * block_size, and the
+    PrimeBitmap of the numbers below limit.
+    """
+    if block_size <= 0:
+        raise ValueError("invalid block size %s" % block_size)
+    bitmap = build_prime_bitmap(limit)
+    checkpoints = [0]
+    total = 0
+    for low in range(0, limit - limit % block_size, block_size):
+        total += sum(bitmap.iter_primes(low, low + block_size))
+        checkpoints.append(total)
+
+    with open(file_name, 'wb') as table_file:
+        table_file.write(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, limit,
+                                           block_size, len(checkpoints)))
+        for checkpoint in checkpoints:
+            table_file.write(TABLE_CHECKPOINT.pack(checkpoint))
+        table_file.write(bitmap.bits)
+
+
+class PrimeTable(object):
+    """
+    Read only, memory mapped view of a table written by build_prime_table.
+    The pages are shared through the OS page cache, opening is O(1).
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as table_file:
+            self.buffer = mmap.mmap(table_file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        (magic, version, self.limit, self.block_size,
+         self.checkpoints) = TABLE_HEADER.unpack_from(self.buffer, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            self.close()
+            raise ValueError("invalid prime table %s" % file_name)
+        self.bitmap = PrimeBitmap(
+            self.limit, self.buffer,
+            TABLE_HEADER.size + self.checkpoints * TABLE_CHECKPOINT.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+
+    def sum_primes(self, input_number):
+        """
+        Sum all prime numbers less than input number: one checkpoint
+        read, then a scan of at most one block of the primality map.
+        """
+        if input_number <= 2:
+            return 0
+        if input_number > self.limit:
+            raise ValueError("input number %s > %s" % (input_number,
+                                                        self.limit))
+        block = input_number // self.block_size
+        total = TABLE_CHECKPOINT.unpack_from(
+            self.buffer,
+            TABLE_HEADER.size + block * TABLE_CHECKPOINT.size)[0]
+        return total + sum(self.bitmap.iter_primes(block * self.block_size,
+                                                   input_number))
+
+
+class SumPrimesCache(object):
+    """
+    Two level sum_primes result cache: a bounded in process LRU,
+    backed by an optional sqlite file keyed by number, method and
+    ALGORITHM_VERSION, which survives process restarts.
+    """
+    def __init__(self, max_size=CACHE_SIZE, file_name=None):
+        self.max_size = max_size
+        self.file_name = file_name
+        self.entries = collections.OrderedDict()
+        self.hits = self.disk_hits = self.misses = 0
+        self.connection = None
+        if file_name:
+            self.connection = sqlite3.connect(file_name)
+            # results may exceed 64 bits, they are stored as text
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS sum_primes ('
+                'number INTEGER, method TEXT, version INTEGER, result TEXT, '
+                'PRIMARY KEY (number, method, version))')
+            self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def stats(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses}
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get(self, input_number, method=SIEVE):
+        """
+        Cached result, or None
+        """
+        key = (input_number, method)
+        result = self.entries.pop(key, None)
+        if result is not None:
+            self.entries[key] = result
+            self.hits += 1
+            return result
+        if self.connection is not None:
+            row = self.connection.execute(
+                'SELECT result FROM sum_primes '
+                'WHERE number = ? AND method = ? AND version = ?',
+                (input_number, method, ALGORITHM_VERSION)).fetchone()
+            if row is not None:
+                result = int(row[0])
+                self._remember(key, result)
+                self.disk_hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, input_number, method, result):
+        self._remember((input_number, method), result)
+        if self.connection is not None:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO sum_primes VALUES (?, ?, ?, ?)',
+                (input_number, method, ALGORITHM_VERSION, str(result)))
+            self.connection.commit()
+
+
+def sum_primes_many(numbers, segment_size=SEGMENT_SIZE):
+    """
+    Sum all prime numbers less than each of the input numbers.
+
+    The numbers are answered in a single segmented sieve sweep up to
+    the largest one: the running sum is recorded at each number's
+    boundary.  Results are returned in the input order.
+    """
+    results = [0] * len(numbers)
+    # (number, position) sorted by number, skipping those without primes
+    queries = sorted((number, position)
+                     for position, number in enumerate(numbers)
+                     if number > 2)
+    if not queries:
+        return results
+
+    largest = queries[-1][0]
+    if largest > MAX_NUMBER:
+        raise ValueError("input number %s > %s" % (largest, MAX_NUMBER))
+
+    base_primes = odd_base_primes(isqrt(largest - 1))
+    span = 2 * segment_size
+    total = 2
+    query = 0
+    for low in range(3, largest, span):
+        high = min(low + span, largest)
+        flags = sieve_segment(low, high, base_primes)
+        primes = list(itertools.compress(range(low, high, 2), flags))
+        # answer the numbers whose boundary falls within this segment
+        counted = 0
+        while query < len(queries) and queries[query][0] <= high:
+            number, position = queries[query]
+            below = bisect.bisect_left(primes, number, counted)
+            total += sum(primes[counted:below])
+            counted = below
+            results[position] = total
+            query += 1
+        total += sum(primes[counted:])
+    for number, position in queries[query:]:
+        results[position] = total
+    return results
+
+
+def lucy_sum_primes(input_number):
+    """
+    Sum all prime numbers less than  input number, sublinear algorithm
+    (Lucy Hedgehog's variant of the Meissel-Lehmer method).
+
+    S(v, p) is the sum of the numbers in [2, v] which are either prime
+    or have no prime factor <= p.  Only the O(sqrt N) distinct values
+    v = N // i are tracked; for each prime p <= sqrt(N):
+        S(v, p) = S(v, p - 1) - p * (S(v // p, p - 1) - S(p - 1, p - 1))
+    O(N ** 3/4) time and O(sqrt N) memory.
+    """
+    number = input_number - 1
+    if number < 2:
+        return 0
+    root = isqrt(number)
+    # small[v] = S(v) for v <= root; large[i] = S(number // i) for i <= root
+    small = [v * (v + 1) // 2 - 1 for v in range(root + 1)]
+    small[0] = 0
+    large = [0] + [(number // i) * (number // i + 1) // 2 - 1
+                   for i in range(1, root + 1)]
+    for prime in range(2, root + 1):
+        if small[prime] == small[prime - 1]:
+            continue  # not a prime
+        sum_below = small[prime - 1]
+        square = prime * prime
+        quotient = number // prime
+        last = min(root, number // square)
+        # number // (i * prime) is a large value while i * prime <= root
+        border = min(last, root // prime)
+        for i in range(1, border + 1):
+            large[i] -= prime * (large[i * prime] - sum_below)
+        for i in range(border + 1, last + 1):
+            large[i] -= prime * (small[quotient // i] - sum_below)
+        for v in range(root, square - 1, -1):
+            small[v] -= prime * (small[v // prime] - sum_below)
+    return large[1]
+
+
+def sum_primes(input_number, segment_size=SEGMENT_SIZE, workers=None,
+               table=None, method=SIEVE, cache=None):
+    """
+    Sum all prime numbers less than  input number
+
+    Segmented Sieve of Eratosthenes: the odd numbers below input number
+    are sieved one segment of segment_size numbers at a time, using the
+    base primes up to the square root, while keeping a running sum.
+    Memory is bounded by the segment size and the base primes.
+
+    When workers > 1 the segments are distributed over a local
+    process pool of that size.  When a PrimeTable covering the input
+    number is given, the result is looked up instead.
+
+    The LUCY method is sublinear and is not bounded by MAX_NUMBER.
+    Results are looked up and stored in the SumPrimesCache if given.
+    """
+    if method not in METHODS:
+        raise ValueError("unknown method %s" % method)
+
+    if cache is not None:
+        result = cache.get(input_number, method)
+        if result is None:
+            result = sum_primes(input_number, segment_size, workers, table,
+                                method)
+            cache.put(input_number, method, result)
+        return result
+
+    if input_number <= 2:
+        return 0
+
+    if table is not None and input_number <= table.limit:
+        return table.sum_primes(input_number)
+
+    if method == LUCY:
+        return lucy_sum_primes(input_number)
+
+    if input_number > MAX_NUMBER:
+        raise ValueError("input number %s > %s" % (input_number, MAX_NUMBER))
+
+    base_primes = odd_base_primes(isqrt(input_number - 1))
+    # 1 is not a prime, start sieving from 3; 2 is added back
+    if workers and workers > 1 and input_number > 2 * segment_size:
+        total = _parallel_sum_odd_range(3, input_number, base_primes,
+                                        segment_size, workers)
+    else:
+        total = sum_odd_range(3, input_number, base_primes, segment_size)
+    return total + 2
+
+
 def calc():
     """
     Process user input, validate, perform sum of primes calculation
@@ -115,20 +866,62 @@ def calc():
     parser = argparse.ArgumentParser(description='Sum prime numbers.')
     parser.add_argument('numbers', metavar='N', type=int, nargs='+',
                        help='boundary input number')
+    parser.add_argument('-w', '--workers', default=None, type=int,
+                        help='number of worker processes')
+    parser.add_argument('-m', '--method', default=SIEVE, choices=METHODS,
+                        help='summation method; %s is not bounded by %s' % (
+                            LUCY, MAX_NUMBER))
+    parser.add_argument('-t', '--table', default=None,
+                        help='prime sum table file to answer from')
+    parser.add_argument('-b', '--build-table', action='store_true',
+                        help='build the prime sum table file first')
+    parser.add_argument('-c', '--cache', default=None,
+                        help='persistent result cache file')
 
     args = parser.parse_args()
-    print "Computing for the following targets: %s." % args.numbers
-    print "N", "\t" * 3, "sum_primes(N)", "\t\t",  "seconds"
-    print "=" * 10, "\t" * 2, "=" * 13, "\t\t", "=" * 7
+    table = None
+    if args.table:
+        if args.build_table:
+            print("Building prime sum table %s." % args.table)
+            build_prime_table(args.table)
+        table = PrimeTable(args.table)
+    cache = None
+    if args.cache:
+        cache = SumPrimesCache(file_name=args.cache)
+    print("Computing for the following targets: %s." % args.numbers)
+    numbers = []
     for number in args.numbers:
-        if number > MAX_NUMBER:
-            print "skipping input number %s > %s" % (number, MAX_NUMBER)
+        if number > MAX_NUMBER and args.method == SIEVE and not (
+                table and number <= table.limit):
+            print("skipping input number %s > %s" % (number, MAX_NUMBER))
             continue
-        start = time.clock()
-        result = sum_primes(number)
-        end = time.clock()
-        print "{:10}\t\t{:13}\t\t{:.4}".format(
-                    number, result, end - start)
+        numbers.append(number)
+
+    if (len(numbers) > 1 and args.method == SIEVE and table is None
+            and cache is None and not args.workers):
+        # single sieve sweep for all the targets, timed as a whole
+        print("N", "\t" * 3, "sum_primes(N)")
+        print("=" * 10, "\t" * 2, "=" * 13)
+        start = timeit.default_timer()
+        results = sum_primes_many(numbers)
+        end = timeit.default_timer()
+        for number, result in zip(numbers, results):
+            print("{:10}\t\t{:13}".format(number, result))
+        print("Total seconds: {:.4}".format(end - start))
+        return
+
+    print("N", "\t" * 3, "sum_primes(N)", "\t\t",  "seconds")
+    print("=" * 10, "\t" * 2, "=" * 13, "\t\t", "=" * 7)
+    for number in numbers:
+        start = timeit.default_timer()
+        result = sum_primes(number, workers=args.workers, table=table,
+                            method=args.method, cache=cache)
+        end = timeit.default_timer()
+        print("{:10}\t\t{:13}\t\t{:.4}".format(
+                    number, result, end - start))
+    if cache is not None:
+        print("Cache: %s." % cache.stats())
+        cache.close()
 
 if __name__ == '__main__':
     calc()
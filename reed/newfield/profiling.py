@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -#- coding: utf-8 -#-
+"""
+Created on Oct 18, 2026
+
+@author: ajaniv
+
+Profiling harness for the calc() workloads of the modules.
+
+run: profile a module's calc() with the given arguments under cProfile,
+saving the stats file and, next to it, a JSON file of metadata (host,
+platform, Python version, module, arguments, elapsed seconds).
+show: print a stats file with its metadata.
+diff: compare two stats files by cumulative and self time per function,
+largest changes first, to show the hot path changes of an optimization.
+
+> profiling.py run -o before.stat comb 1.00 999.99
+> profiling.py run -o after.stat comb 1.00 999.99
+> profiling.py diff before.stat after.stat
+"""
+from __future__ import print_function
+
+import argparse
+import cProfile
+import datetime
+import importlib
+import json
+import os
+import platform
+import pstats
+import socket
+import sys
+import tempfile
+import timeit
+import unittest
+
+MODULES = ('comb', 'prime_sum', 'acquaintances')
+DEFAULT_LIMIT = 20
+CUMULATIVE = 'cumulative'
+SELF = 'self'
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profile_calc(self):
+        stat_dir = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(stat_dir, 'prime_sum.stat')
+            metadata = profile_calc('prime_sum', ['100', '1000'], file_name)
+            self.assertEqual(['100', '1000'], metadata['args'])
+            self.assertEqual(metadata, load_metadata(file_name))
+            times = function_times(file_name)
+            self.assertTrue(any('sum_primes_many' in label
+                                for label in times))
+            diff = diff_profiles(file_name, file_name)
+            self.assertEqual([CUMULATIVE, SELF], sorted(diff))
+            self.assertTrue(all(delta == 0 for _, _, _, delta
+                                in diff[CUMULATIVE]))
+        finally:
+            for name in os.listdir(stat_dir):
+                os.remove(os.path.join(stat_dir, name))
+            os.rmdir(stat_dir)
+
+
+def metadata_file_name(file_name):
+    return file_name + '.json'
+
+
+def profile_calc(module_name, args, file_name):
+    """
+    Run module_name.calc() with the command line args under cProfile,
+    save the stats to file_name and return the metadata saved with them.
+    """
+    module = importlib.import_module(module_name)
+    argv = sys.argv
+    sys.argv = [module_name + '.py'] + list(args)
+    profiler = cProfile.Profile()
+    start = timeit.default_timer()
+    try:
+        profiler.runcall(module.calc)
+    finally:
+        end = timeit.default_timer()
+        sys.argv = argv
+    profiler.dump_stats(file_name)
+
+    metadata = {
+        'module': module_name,
+        'args': list(args),
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'created': datetime.datetime.now().isoformat(),
+        'seconds': end - start,
+    }
+    with open(metadata_file_name(file_name), 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent=2, sort_keys=True)
+    return metadata
+
+
+def load_metadata(file_name):
+    """
+    Metadata saved with a stats file, empty when there is none
+    """
+    try:
+        with open(metadata_file_name(file_name)) as metadata_file:
+            return json.load(metadata_file)
+    except IOError:
+        return {}
+
+
+def function_times(file_name):
+    """
+    {function: (cumulative seconds, self seconds)} of a stats file
+    """
+    stats = pstats.Stats(file_name).strip_dirs()
+    return dict((pstats.func_std_string(function), (cumulative, own))
+                for function, (_, _, own, cumulative, _)
+                in stats.stats.items())
+
+
+def diff_profiles(before, after, limit=None):
+    """
+    For cumulative and self time, the list of
+    (function, before seconds, after seconds, delta) sorted by
+    decreasing absolute delta, limited to limit entries.
+    """
+    before_times = function_times(before)
+    after_times = function_times(after)
+    functions = set(before_times) | set(after_times)
+    diff = {}
+    for index, kind in enumerate((CUMULATIVE, SELF)):
+        rows = []
+        for function in functions:
+            old = before_times.get(function, (0.0, 0.0))[index]
+            new = after_times.get(function, (0.0, 0.0))[index]
+            rows.append((function, old, new, new - old))
+        rows.sort(key=lambda row: (-abs(row[3]), row[0]))
+        diff[kind] = rows[:limit]
+    return diff
+
+
+def print_metadata(file_name):
+    metadata = load_metadata(file_name)
+    print("%s: %s" % (file_name, ', '.join(
+        '%s=%s' % item for item in sorted(metadata.items()))))
+
+
+def calc():
+    """
+    Process user input, run, show or diff profiles
+    """
+    parser = argparse.ArgumentParser(description='Profile calc workloads.')
+    commands = parser.add_subparsers(dest='command')
+    # subcommands are optional by default on Python 3
+    commands.required = True
+
+    run = commands.add_parser('run', help='profile a module calc()')
+    run.add_argument('module', choices=MODULES)
+    run.add_argument('-o', '--output', default=None,
+                     help='stats file, <module>.stat by default')
+    run.add_argument('args', nargs=argparse.REMAINDER,
+                     help='calc() arguments, all those after the module')
+
+    show = commands.add_parser('show', help='print a stats file')
+    show.add_argument('stat_file')
+    show.add_argument('-s', '--sort', default=CUMULATIVE,
+                      help='pstats sort key')
+    show.add_argument('-n', '--limit', default=DEFAULT_LIMIT, type=int,
+                      help='number of functions')
+
+    diff = commands.add_parser('diff', help='compare two stats files')
+    diff.add_argument('before')
+    diff.add_argument('after')
+    diff.add_argument('-n', '--limit', default=DEFAULT_LIMIT, type=int,
+                      help='number of functions')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        calc_args = args.args
+        if calc_args and calc_args[0] == '--':
+            calc_args = calc_args[1:]
+        file_name = args.output or args.module + '.stat'
+        profile_calc(args.module, calc_args, file_name)
+        print_metadata(file_name)
+    elif args.command == 'show':
+        print_metadata(args.stat_file)
+        pstats.Stats(args.stat_file).strip_dirs().sort_stats(
+            args.sort).print_stats(args.limit)
+    else:
+        print_metadata(args.before)
+        print_metadata(args.after)
+        results = diff_profiles(args.before, args.after, args.limit)
+        for kind in (CUMULATIVE, SELF):
+            print("\n%s time" % kind.capitalize())
+            print("{:>10} {:>10} {:>10}  {}".format(
+                'before', 'after', 'delta', 'function'))
+            for function, old, new, delta in results[kind]:
+                print("{:10.4f} {:10.4f} {:+10.4f}  {}".format(
+                    old, new, delta, function))
+
+if __name__ == '__main__':
+    calc()